@@ -1,11 +1,17 @@
 import os
 import re
 import sys
+import datetime
+import threading
 import subprocess
-from typing import Optional, Dict, Any
-from openai import OpenAI
+from typing import Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backend.Core import get_client
+from Backend.Sandbox import get_sandbox_pool
+from Backend.Safety import SafetyAnalyzer
+from Backend.Tracing import get_tracer
 
 class FalconAI:
     """
@@ -13,12 +19,33 @@ class FalconAI:
     A powerful AI assistant that can execute system tasks safely and efficiently.
     """
     
-    def __init__(self):
-        """Initialize Falcon AI Assistant"""
+    # Cached code older than this is regenerated
+    CODE_CACHE_TTL = 7 * 24 * 60 * 60
+    
+    def __init__(self, code_cache=None, sandbox=None):
+        """
+        Initialize Falcon AI Assistant
+        
+        Args:
+            code_cache (FALCONDatabase, optional): Store for generated code of
+                successful tasks. Without it every task is sent to the LLM.
+            sandbox (SandboxPool, optional): Worker pool that runs generated
+                code. Defaults to the shared pool.
+        """
+        self.code_cache = code_cache
+        self._sandbox = sandbox
+        self.safety = SafetyAnalyzer()
         self.load_environment()
         self.initialize_client()
         self.setup_conversation_context()
         
+    @property
+    def sandbox(self):
+        """Worker pool for generated code, started on first use"""
+        if self._sandbox is None:
+            self._sandbox = get_sandbox_pool()
+        return self._sandbox
+        
     def load_environment(self):
         """Load environment variables safely"""
         try:
@@ -31,15 +58,15 @@ class FalconAI:
             sys.exit(1)
             
     def initialize_client(self):
-        """Initialize the Groq API client"""
-        try:
-            self.client = OpenAI(
-                base_url="https://api.groq.com/openai/v1",
-                api_key=self.api_key
-            )
-        except Exception as e:
-            print(f"❌ Failed to initialize API client: {e}")
-            sys.exit(1)
+        """Defer the Groq API client until the first task needs it"""
+        self._client = None
+        
+    @property
+    def client(self):
+        """Groq API client, shared with the assistant so both reuse one connection pool"""
+        if self._client is None:
+            self._client = get_client()
+        return self._client
             
     def setup_conversation_context(self):
         """Setup the conversation context for Falcon AI"""
@@ -157,76 +184,80 @@ class FalconAI:
     
     def validate_code_safety(self, code: str) -> bool:
         """
-        Basic safety validation for code execution
+        Static safety validation for code execution
         
         Args:
             code (str): Python code to validate
             
         Returns:
-            bool: True if code appears safe, False otherwise
+            bool: True if code passes the allowlist checks, False otherwise
         """
-        dangerous_patterns = [
-            r'rm\s+-rf',
-            r'del\s+/[fFsS]',
-            r'format\s+[cC]:',
-            r'__import__\s*\(\s*["\']os["\']',
-            r'eval\s*\(',
-            r'exec\s*\(',
-            r'open\s*\([^)]*["\'][wWaA]'
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return False
-                
-        return True
+        return self.safety.analyze(code).safe
     
     def execute_python_code(self, code: str) -> str:
         """
-        Safely execute Python code with error handling
+        Safely execute Python code in a sandbox worker process
         
         Args:
             code (str): Python code to execute
             
         Returns:
-            str: Execution result message
+            str: Empty string on success, otherwise the reason it failed
         """
         if not code:
-            return ""
-            
-        if not self.validate_code_safety(code):
-            return ""
+            return "No code to execute."
             
-        try:
-            # Create a controlled execution environment
-            exec_globals = {
-                '__builtins__': __builtins__,
-                'print': print,
-                # Add safe modules
-                'os': os,
-                'time': __import__('time'),
-                'webbrowser': __import__('webbrowser'),
-                'psutil': __import__('psutil') if self._module_available('psutil') else None
-            }
-            
-            # Execute the code
-            exec(code, exec_globals)
-            
-            return ""
+        report = self.safety.analyze(code)
+        if not report.safe:
+            return f"Code failed safety validation: {report}"
             
-        except ImportError as e:
+        # Run out of process so a slow or crashing snippet can't take the
+        # assistant down with it
+        result = self.sandbox.execute(code)
+        if result["stdout"]:
+            print(result["stdout"], end="")
+        if result["ok"]:
             return ""
+        return result["error"] or f"Exited with status {result['exit_status']}"
+    
+    @staticmethod
+    def normalize_task(task: str) -> str:
+        """
+        Normalize a task description into a cache key
+        
+        Args:
+            task (str): Task description
             
-        except Exception as e:
-            return ""
+        Returns:
+            str: Lowercased task without punctuation, filler words or extra spaces
+        """
+        task = re.sub(r'[^\w\s]', ' ', task.lower())
+        task = re.sub(r'\b(please|falcon|can you|could you|for me|now)\b', ' ', task)
+        return re.sub(r'\s+', ' ', task).strip()
     
-    def _module_available(self, module_name: str) -> bool:
-        """Check if a module is available for import"""
-        try:
-            __import__(module_name)
-            return True
-        except ImportError:
+    def run_cached_task(self, task_key: str) -> bool:
+        """
+        Execute previously generated code for a task
+
+        Only code that ran cleanly is cached, and execute_python_code
+        analyzes it again before it runs.
+        
+        Args:
+            task_key (str): Normalized task
+            
+        Returns:
+            bool: True if cached code ran successfully
+        """
+        code = self.code_cache.get_cached_code(task_key, self.CODE_CACHE_TTL)
+        if not code:
             return False
+            
+        if not self.execute_python_code(code):
+            return True
+            
+        # Stale or broken entry: drop it and let the LLM write fresh code
+        self.code_cache.invalidate_cached_code(task_key)
+        return False
     
     def run_task(self, task: str) -> str:
         """
@@ -236,24 +267,45 @@ class FalconAI:
             task (str): Task description
             
         Returns:
-            str: Final execution result
+            str: Empty string on success, otherwise the reason it failed
         """
         if not task.strip():
             return ""
             
-        # Step 1: Get AI response
-        response = self.execute_task(task)
-        if not response:
-            return ""
+        tracer = get_tracer()
+        with tracer.span("task.run") as span:
+            task_key = self.normalize_task(task)
             
-        # Step 2: Extract code
-        code = self.extract_code_from_response(response)
-        if not code:
-            return ""
+            # Step 0: Reuse code that already worked for this task
+            if self.code_cache:
+                with tracer.span("task.cached"):
+                    cached = self.run_cached_task(task_key)
+                span.set(cached=cached)
+                if cached:
+                    return ""
+                
+            # Step 1: Get AI response
+            with tracer.span("task.llm"):
+                response = self.execute_task(task)
+            if not response:
+                span.set(ok=False)
+                return "No response from the task model."
+                
+            # Step 2: Extract code
+            code = self.extract_code_from_response(response)
+            if not code:
+                span.set(ok=False)
+                return "No code was generated for the task."
+                
+            # Step 3: Execute code silently
+            with tracer.span("task.execute"):
+                error = self.execute_python_code(code)
+            span.set(ok=not error)
             
-        # Step 3: Execute code silently
-        self.execute_python_code(code)
-        return ""
+            # Step 4: Remember code that ran cleanly
+            if self.code_cache and not error:
+                self.code_cache.save_cached_code(task_key, task, code)
+            return error
     
     def interactive_mode(self):
         """Run Falcon AI in interactive mode"""
@@ -261,7 +313,9 @@ class FalconAI:
         try:
             task = input("").strip()
                 
-            self.run_task(task)
+            error = self.run_task(task)
+            if error:
+                print(f"❌ {error}")
             
         except Exception as e:
             pass
@@ -284,7 +338,9 @@ def main():
         # Check if running with command line argument
         if len(sys.argv) > 1:
             task = ' '.join(sys.argv[1:])
-            falcon.run_task(task)
+            error = falcon.run_task(task)
+            if error:
+                print(f"❌ {error}")
         else:
             falcon.interactive_mode()
             
@@ -292,6 +348,16 @@ def main():
         print(f"❌ Failed to initialize Falcon AI: {e}")
 
 class ContentGenerator:
+    """
+    Long-lived Gemini writer.
+
+    The API is configured and the model built once; every piece is streamed
+    into its own file under Database/Content as the chunks arrive.
+    """
+
+    MODEL_NAME = "gemini-2.0-flash-exp"
+    SYSTEM_INSTRUCTION = "You are FALCON. Your task is to generate high-quality content based on the provided prompt. You are writer you can write articles, blogs and code, based on user input, you will generate content that is clear, concise, and informative. Also use enojis in your response."
+
     def __init__(self, api_key=None):
         """
         Initialize the Content Generator
@@ -305,7 +371,9 @@ class ContentGenerator:
         if not self.api_key:
             raise ValueError("No API key found. Please set GEMINI_API_KEY in .env")
         
+        import google.generativeai as genai
         genai.configure(api_key=self.api_key)
+        self.genai = genai
         
         # Default generation configuration
         self.generation_config = {
@@ -315,13 +383,20 @@ class ContentGenerator:
             "max_output_tokens": 8192,
             "response_mime_type": "text/plain",
         }
+
+        # Reused for every piece; per-call overrides go through generate_content
+        self.model = genai.GenerativeModel(
+            model_name=self.MODEL_NAME,
+            generation_config=self.generation_config,
+            system_instruction=self.SYSTEM_INSTRUCTION,
+        )
         
         # Create output directory if not exists
         self.output_dir = self._create_output_directory()
 
     def _create_output_directory(self):
-        """Create 'generated_content' directory if it doesn't exist"""
-        output_dir = "Database"
+        """Create the 'Database/Content' directory if it doesn't exist"""
+        output_dir = os.path.join("Database", "Content")
         os.makedirs(output_dir, exist_ok=True)
         return output_dir
 
@@ -330,49 +405,68 @@ class ContentGenerator:
         clean_title = re.sub(r'[^\w\s-]', '', title)
         return clean_title.strip().replace(' ', '_')
 
-    def generate_content(self, prompt, custom_config=None):
+    def _output_path(self, prompt):
+        """Unique file for one piece: timestamp plus the first words of the prompt"""
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        title = self._clean_filename(" ".join(prompt.split()[:8]))[:60] or "content"
+        return os.path.join(self.output_dir, f"{stamp}_{title}.txt")
+
+    def generate_content(self, prompt, custom_config=None, on_chunk=None, open_file=True):
         """
-        Generate content based on the given prompt
+        Generate content based on the given prompt, streaming it to a new file
         
         Args:
             prompt (str): Content generation prompt
             custom_config (dict, optional): Custom generation configuration
+            on_chunk (callable, optional): Receives each text chunk as it arrives
+            open_file (bool): Open the finished file in the default editor
         
         Returns:
-            str: Generated content
+            str: Path of the file written
+
+        Raises:
+            Exception: Whatever the model or the file write raised; the
+            partial file is removed first
         """
-        # Merge default and custom configuration
-        config = {**self.generation_config, **(custom_config or {})}
+        filepath = self._output_path(prompt)
         
-        try:
-            # Initialize the model
-            model = genai.GenerativeModel(
-                model_name="gemini-2.0-flash-exp",
-                generation_config=config,
-                system_instruction="You are FALCON. Your task is to generate high-quality content based on the provided prompt. You are writer you can write articles, blogs and code, based on user input, you will generate content that is clear, concise, and informative. Also use enojis in your response.",
-            )
-
-            # Start chat session and get response
-            chat_session = model.start_chat(history=[])
-            response = chat_session.send_message(prompt)
-            content = response.text
+        with get_tracer().span("content.generate") as span:
+            try:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=custom_config or None,
+                    stream=True
+                )
 
-            # Generate unique filename with timestamp
-            filename = f"Content.txt"
-            filepath = os.path.join(self.output_dir, filename)
+                # Each chunk is on disk (and on screen) as soon as it arrives
+                characters = 0
+                with open(filepath, 'w', encoding='utf-8') as file:
+                    for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # Chunks without text parts, e.g. a final safety verdict
+                            continue
+                        if not characters:
+                            span.set(first_chunk_ms=span.elapsed_ms())
+                        characters += len(text)
+                        file.write(text)
+                        file.flush()
+                        if on_chunk:
+                            on_chunk(text)
+                span.set(characters=characters)
 
-            # Save content to file
-            with open(filepath, 'w', encoding='utf-8') as file:
-                file.write(content)
+                # Open file in default text editor
+                if open_file:
+                    self._open_file(filepath)
 
-            # Open file in default text editor
-            self._open_file(filepath)
+                return filepath
 
-            return content
-
-        except Exception as e:
-            print(f"Error generating content: {e}")
-            return None
+            except Exception:
+                # Don't leave half an answer behind in Database/Content
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+                raise
 
     def _open_file(self, filepath):
         """Open file in default text editor"""
@@ -384,8 +478,24 @@ class ContentGenerator:
         except Exception as e:
             print(f"Error opening file: {e}")
 
-def Coder(topic):
-    """Interactive content generation CLI"""
-    generator = ContentGenerator()
+_content_generator = None
+_content_generator_lock = threading.Lock()
+
+def get_content_generator():
+    """Return the shared content generator, configuring Gemini on first use"""
+    global _content_generator
+    with _content_generator_lock:
+        if _content_generator is None:
+            _content_generator = ContentGenerator()
+        return _content_generator
+
+def Coder(topic, on_chunk=None):
+    """
+    Generate a piece of content with the shared generator
+
+    Returns:
+        str: Path of the file written
+    """
+    generator = get_content_generator()
     user_prompt = topic
-    generator.generate_content(user_prompt)
\ No newline at end of file
+    return generator.generate_content(user_prompt, on_chunk=on_chunk)
@@ -1,166 +1,698 @@
 import os
 import sys
+import re
 import json
+import time
 import datetime
+import asyncio
 import sqlite3
-import pandas as pd
-from openai import OpenAI
-from dotenv import load_dotenv
-from Backend.Automation import FalconAI, Coder
-from Backend.ImageGen import Main as ImageGenMain
+import queue
+import threading
+import contextvars
+from collections import deque
+from types import SimpleNamespace
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from Backend.Automation import FalconAI
+from Backend.Context import ContextBuilder
+from Backend.Intents import IntentRouter
+from Backend.ResponseCache import ResponseCache
+from Backend.Jobs import JobManager
+from Backend.Export import EXPORT_WRITERS, CHUNK_SIZE, default_export_path, stream_export
+from Backend.Core import get_client, get_async_client, get_runtime
+from Backend.Tracing import get_tracer, persistence_enabled
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-# Load environment variables
-load_dotenv()
-API_KEY = os.getenv("GROQ_API_KEY")
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections in WAL mode"""
 
-if not API_KEY:
-    raise ValueError("GROQ_API_KEY not found in environment variables")
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-8000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
 
-# Initialize OpenAI client
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1", 
-    api_key=API_KEY
-)
+    def __init__(self, db_path, size=4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # SQLite allows a single writer; readers keep going under WAL
+        self.write_lock = threading.RLock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5.0,
+            check_same_thread=False,
+            cached_statements=128
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, opening a new one while under the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Serialized write transaction, committed on success"""
+        with self.write_lock, self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
 
 class FALCONDatabase:
     """Database handler for FALCON conversations"""
-    
-    def __init__(self, db_path='Database/FALCON.db'):
+
+    # Statements are kept as constants so sqlite3's per-connection
+    # statement cache reuses the prepared form across calls
+    INSERT_CONVERSATION = 'INSERT INTO conversations (user, assistant) VALUES (?, ?)'
+    UPDATE_ASSISTANT = 'UPDATE conversations SET assistant = ? WHERE id = ?'
+    SELECT_HISTORY = """
+        SELECT user, assistant
+        FROM conversations
+        WHERE assistant IS NOT NULL
+        ORDER BY timestamp ASC, id ASC
+        """
+    # Walks the (timestamp, id) index backwards for the newest turns,
+    # then puts them back in chronological order
+    SELECT_RECENT = """
+        SELECT id, user, assistant FROM (
+            SELECT id, user, assistant, timestamp
+            FROM conversations
+            WHERE assistant IS NOT NULL
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        )
+        ORDER BY timestamp ASC, id ASC
+        """
+    SELECT_BETWEEN = """
+        SELECT id, user, assistant FROM (
+            SELECT id, user, assistant
+            FROM conversations
+            WHERE id > ? AND id <= ? AND assistant IS NOT NULL
+            ORDER BY id DESC
+            LIMIT ?
+        )
+        ORDER BY id ASC
+        """
+    SELECT_AFTER = """
+        SELECT id, user, assistant
+        FROM conversations
+        WHERE id > ? AND assistant IS NOT NULL
+        ORDER BY id ASC
+        LIMIT ?
+        """
+    SEARCH_LIKE = """
+        SELECT user, assistant, timestamp
+        FROM conversations
+        WHERE user LIKE ? OR assistant LIKE ?
+        ORDER BY timestamp DESC
+        LIMIT ? OFFSET ?
+        """
+    SEARCH_FTS = """
+        SELECT c.user, c.assistant, c.timestamp,
+               snippet(conversations_fts, -1, '[', ']', '...', 12)
+        FROM conversations_fts
+        JOIN conversations c ON c.id = conversations_fts.rowid
+        WHERE conversations_fts MATCH ?
+        ORDER BY bm25(conversations_fts), c.timestamp DESC
+        LIMIT ? OFFSET ?
+        """
+    JOB_COLUMNS = ('id', 'kind', 'payload', 'status', 'progress', 'message', 'result', 'error',
+                   'created_at', 'updated_at')
+    SPAN_COLUMNS = ('trace_id', 'span_id', 'parent_id', 'name', 'started_at', 'duration_ms',
+                    'status', 'attrs')
+
+    def __init__(self, db_path='Database/FALCON.db', pool_size=4):
         self.db_path = db_path
         db_dir = os.path.dirname(db_path)
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        self.fts_enabled = False
         self.init_database()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Borrow a pooled connection; use as a context manager"""
+        return self.pool.connection()
+
+    def close(self):
+        self.pool.close_all()
 
     def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user TEXT NOT NULL,
-            assistant TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tags (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conversation_id INTEGER,
-            tag_name TEXT,
-            FOREIGN KEY (conversation_id) REFERENCES conversations(id)
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user TEXT NOT NULL,
+                assistant TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id INTEGER,
+                tag_name TEXT,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(id)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conversations_timestamp
+            ON conversations (timestamp, id)
+            ''')
+
+            # Only code that passed analysis and exited cleanly is cached, and it
+            # is re-analyzed on every run, so no verdict is stored. Caches from
+            # before that are dropped rather than migrated
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(task_code_cache)')}
+            if 'is_safe' in columns:
+                cursor.execute('DROP TABLE task_code_cache')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS task_code_cache (
+                task_key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                code TEXT NOT NULL,
+                hits INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                name TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                covered_until INTEGER NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_status
+            ON jobs (status, created_at)
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS spans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                trace_id TEXT NOT NULL,
+                span_id TEXT NOT NULL,
+                parent_id TEXT,
+                name TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                duration_ms REAL NOT NULL,
+                status TEXT NOT NULL,
+                attrs TEXT
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_spans_started
+            ON spans (started_at, name)
+            ''')
+
+        self.fts_enabled = self.init_fts()
+
+    def init_fts(self):
+        """Create the FTS5 index and its sync triggers, backfilling existing rows once"""
+        try:
+            with self.pool.transaction() as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_fts'"
+                ).fetchone()
+
+                conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+                    user, assistant, content='conversations', content_rowid='id'
+                )
+                ''')
+
+                conn.executescript('''
+                CREATE TRIGGER IF NOT EXISTS conversations_ai AFTER INSERT ON conversations BEGIN
+                    INSERT INTO conversations_fts(rowid, user, assistant)
+                    VALUES (new.id, new.user, new.assistant);
+                END;
+                CREATE TRIGGER IF NOT EXISTS conversations_ad AFTER DELETE ON conversations BEGIN
+                    INSERT INTO conversations_fts(conversations_fts, rowid, user, assistant)
+                    VALUES ('delete', old.id, old.user, old.assistant);
+                END;
+                CREATE TRIGGER IF NOT EXISTS conversations_au AFTER UPDATE ON conversations BEGIN
+                    INSERT INTO conversations_fts(conversations_fts, rowid, user, assistant)
+                    VALUES ('delete', old.id, old.user, old.assistant);
+                    INSERT INTO conversations_fts(rowid, user, assistant)
+                    VALUES (new.id, new.user, new.assistant);
+                END;
+                ''')
+
+                if not exists:
+                    # One-time migration for databases created before the index
+                    conn.execute("INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, falling back to LIKE search: {e}")
+            return False
 
     def add_conversation(self, user_message, assistant_message=None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO conversations (user, assistant)
-        VALUES (?, ?)
-        ''', (user_message, assistant_message))
-        conversation_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return conversation_id
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(self.INSERT_CONVERSATION, (user_message, assistant_message))
+            return cursor.lastrowid
 
     def update_assistant_response(self, conversation_id, assistant_message):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        UPDATE conversations 
-        SET assistant = ? 
-        WHERE id = ?
-        ''', (assistant_message, conversation_id))
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            conn.execute(self.UPDATE_ASSISTANT, (assistant_message, conversation_id))
+
+    def get_recent_turns(self, limit):
+        """Latest `limit` completed (id, user, assistant) turns, oldest first"""
+        with self.pool.connection() as conn:
+            return conn.execute(self.SELECT_RECENT, (limit,)).fetchall()
+
+    def get_turns_between(self, after_id, until_id, limit):
+        """Newest `limit` completed turns with after_id < id <= until_id, oldest first"""
+        with self.pool.connection() as conn:
+            return conn.execute(self.SELECT_BETWEEN, (after_id, until_id, limit)).fetchall()
+
+    def get_turns_after(self, after_id, limit):
+        """Oldest `limit` completed turns with id > after_id"""
+        with self.pool.connection() as conn:
+            return conn.execute(self.SELECT_AFTER, (after_id, limit)).fetchall()
+
+    def get_turns_by_ids(self, ids):
+        """Completed (id, user, assistant) turns for the given ids, in the order given"""
+        if not ids:
+            return []
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT id, user, assistant FROM conversations WHERE id IN ({",".join("?" * len(ids))})'
+                ' AND assistant IS NOT NULL',
+                list(ids)
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [by_id[turn_id] for turn_id in ids if turn_id in by_id]
+
+    def get_summary(self, name='rolling'):
+        """Stored (summary, covered_until) pair, or None"""
+        with self.pool.connection() as conn:
+            return conn.execute(
+                'SELECT summary, covered_until FROM summaries WHERE name = ?', (name,)
+            ).fetchone()
+
+    def save_summary(self, summary, covered_until, name='rolling'):
+        with self.pool.transaction() as conn:
+            conn.execute('''
+            INSERT INTO summaries (name, summary, covered_until) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                summary = excluded.summary,
+                covered_until = excluded.covered_until,
+                updated_at = CURRENT_TIMESTAMP
+            ''', (name, summary, covered_until))
 
     def get_conversation_history(self, limit=None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-        SELECT user, assistant 
-        FROM conversations 
-        WHERE assistant IS NOT NULL
-        ORDER BY timestamp ASC
-        '''
-        
+        """Completed turns as chat messages; with a limit, only the latest ones"""
         if limit:
-            query += ' LIMIT ?'
-            cursor.execute(query, (limit,))
+            rows = [(user, assistant) for _, user, assistant in self.get_recent_turns(limit)]
         else:
-            cursor.execute(query)
-            
+            with self.pool.connection() as conn:
+                rows = conn.execute(self.SELECT_HISTORY).fetchall()
+
         messages = []
-        for user_msg, assistant_msg in cursor.fetchall():
+        for user_msg, assistant_msg in rows:
             messages.append({"role": "user", "content": user_msg})
             if assistant_msg:
                 messages.append({"role": "assistant", "content": assistant_msg})
-        
-        conn.close()
         return messages
 
-    def search_conversations(self, keyword):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT user, assistant, timestamp 
-        FROM conversations 
-        WHERE user LIKE ? OR assistant LIKE ?
-        ORDER BY timestamp DESC
-        ''', (f'%{keyword}%', f'%{keyword}%'))
-        results = cursor.fetchall()
-        conn.close()
-        return results
+    def search_conversations(self, keyword, limit=-1, offset=0):
+        """Search conversations, best matches first, as (user, assistant, timestamp, snippet) rows"""
+        if self.fts_enabled:
+            match_query = self._fts_query(keyword)
+            if not match_query:
+                return []
+            with self.pool.connection() as conn:
+                return conn.execute(self.SEARCH_FTS, (match_query, limit, offset)).fetchall()
 
-    def export_conversations(self, format='csv', start_date=None, end_date=None):
-        conn = self.get_connection()
-        
-        query = '''
-        SELECT id, user, assistant, timestamp
-        FROM conversations
-        WHERE 1=1
-        '''
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                self.SEARCH_LIKE, (f'%{keyword}%', f'%{keyword}%', limit, offset)
+            ).fetchall()
+        return [(user, assistant, timestamp, self._like_snippet(keyword, user, assistant))
+                for user, assistant, timestamp in rows]
+
+    @staticmethod
+    def _fts_query(keyword):
+        """Turn free text into a safe FTS5 query of quoted prefix terms"""
+        terms = re.findall(r'\w+', keyword or '')
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def _like_snippet(keyword, *texts, width=40):
+        if not keyword:
+            return ''
+        for text in texts:
+            if not text:
+                continue
+            index = text.lower().find(keyword.lower())
+            if index >= 0:
+                start = max(index - width, 0)
+                end = index + len(keyword)
+                return (('...' if start else '') + text[start:index] + '[' + text[index:end] + ']'
+                        + text[end:end + width] + ('...' if end + width < len(text) else ''))
+        return ''
+
+    def export_conversations(self, format='csv', start_date=None, end_date=None,
+                             path=None, chunk_size=CHUNK_SIZE, on_progress=None):
+        """
+        Stream conversations to a file in chunks
+
+        Dates are 'YYYY-MM-DD' and inclusive. They are compared against the
+        raw timestamp column, so the (timestamp, id) index serves both the
+        range and the ordering.
+
+        Returns:
+            dict: path, rows and format of the finished export
+        """
+        where = ' WHERE 1=1'
         params = []
-        
         if start_date:
-            query += ' AND DATE(timestamp) >= DATE(?)'
+            where += ' AND timestamp >= DATE(?)'
             params.append(start_date)
         if end_date:
-            query += ' AND DATE(timestamp) <= DATE(?)'
+            where += " AND timestamp < DATE(?, '+1 day')"
             params.append(end_date)
-            
-        query += ' ORDER BY timestamp ASC'
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        
-        if format == 'csv':
-            return df.to_csv(index=False)
-        elif format == 'excel':
-            return df.to_excel(index=False)
-        return df.to_dict('records')
+
+        if format not in EXPORT_WRITERS:
+            raise ValueError(f"Unsupported export format '{format}'")
+        path = path or default_export_path(format)
+
+        with self.pool.connection() as conn:
+            # One read transaction: the count and the rows come from the same
+            # snapshot, and new turns can still be written meanwhile under WAL
+            conn.execute('BEGIN')
+            total = conn.execute('SELECT COUNT(*) FROM conversations' + where, params).fetchone()[0]
+            cursor = conn.execute(
+                'SELECT id, user, assistant, timestamp FROM conversations'
+                + where + ' ORDER BY timestamp ASC, id ASC',
+                params
+            )
+            rows = stream_export(cursor, path, format, total, chunk_size, on_progress)
+            conn.rollback()
+
+        return {'path': os.path.abspath(path), 'rows': rows, 'format': format}
+
+    def get_cached_code(self, task_key, ttl_seconds):
+        """Cached code for a task if younger than the TTL, or None"""
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+            SELECT code FROM task_code_cache
+            WHERE task_key = ? AND created_at >= datetime('now', ?)
+            ''', (task_key, f'-{int(ttl_seconds)} seconds')).fetchone()
+        if row:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                UPDATE task_code_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+                WHERE task_key = ?
+                ''', (task_key,))
+        return row[0] if row else None
+
+    def save_cached_code(self, task_key, task, code):
+        with self.pool.transaction() as conn:
+            conn.execute('''
+            INSERT OR REPLACE INTO task_code_cache (task_key, task, code)
+            VALUES (?, ?, ?)
+            ''', (task_key, task, code))
+
+    def invalidate_cached_code(self, task_key):
+        with self.pool.transaction() as conn:
+            conn.execute('DELETE FROM task_code_cache WHERE task_key = ?', (task_key,))
+
+    def list_cached_code(self):
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
+            SELECT task_key, task, code, hits, created_at, last_used_at
+            FROM task_code_cache
+            ORDER BY last_used_at DESC
+            ''')
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def purge_cached_code(self, task_key=None):
+        """Delete one cached entry, or all of them; returns the number removed"""
+        with self.pool.transaction() as conn:
+            if task_key:
+                cursor = conn.execute('DELETE FROM task_code_cache WHERE task_key = ?', (task_key,))
+            else:
+                cursor = conn.execute('DELETE FROM task_code_cache')
+            return cursor.rowcount
+
+    def _job_dict(self, row):
+        job = dict(zip(self.JOB_COLUMNS, row))
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def create_job(self, job_id, kind, payload, message=None):
+        with self.pool.transaction() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, message) VALUES (?, ?, ?, ?)',
+                (job_id, kind, payload, message)
+            )
+
+    def update_job(self, job_id, **fields):
+        """Set status, progress, message, result or error on a job"""
+        columns = [column for column in fields if column in ('status', 'progress', 'message', 'result', 'error')]
+        if not columns:
+            return
+        with self.pool.transaction() as conn:
+            conn.execute(
+                f'UPDATE jobs SET {", ".join(f"{column} = ?" for column in columns)}, '
+                'updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                [fields[column] for column in columns] + [job_id]
+            )
+
+    def get_job(self, job_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f'SELECT {", ".join(self.JOB_COLUMNS)} FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list_jobs(self, limit=20):
+        """Newest jobs first"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {", ".join(self.JOB_COLUMNS)} FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?',
+                (limit,)
+            ).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def get_unfinished_jobs(self):
+        """Queued or running jobs, oldest first"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {", ".join(self.JOB_COLUMNS)} FROM jobs '
+                "WHERE status IN ('queued', 'running') ORDER BY created_at ASC, rowid ASC"
+            ).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def purge_jobs(self, days=7):
+        """Delete finished jobs older than `days`; returns the number removed"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < datetime('now', ?)",
+                (f'-{int(days)} days',)
+            )
+            return cursor.rowcount
+
+    def save_spans(self, spans):
+        """Append finished trace spans (dicts from Tracer) in one transaction"""
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                f'INSERT INTO spans ({", ".join(self.SPAN_COLUMNS)}) VALUES ({", ".join("?" * len(self.SPAN_COLUMNS))})',
+                [tuple(json.dumps(span[column], default=str) if column == 'attrs' else span[column]
+                       for column in self.SPAN_COLUMNS) for span in spans]
+            )
+
+    def get_spans(self, since=None, name=None):
+        """Stored spans started after `since` (epoch seconds), optionally for one stage and those under it"""
+        where = ' WHERE started_at >= ?'
+        params = [since or 0]
+        if name:
+            where += ' AND (name = ? OR substr(name, 1, ?) = ?)'
+            params += [name, len(name) + 1, name + '.']
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {", ".join(self.SPAN_COLUMNS)} FROM spans' + where + ' ORDER BY started_at ASC',
+                params
+            ).fetchall()
+        spans = []
+        for row in rows:
+            span = dict(zip(self.SPAN_COLUMNS, row))
+            span['attrs'] = json.loads(span['attrs']) if span['attrs'] else {}
+            spans.append(span)
+        return spans
+
+    def purge_spans(self, days=7):
+        """Delete spans older than `days`; returns the number removed"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                'DELETE FROM spans WHERE started_at < ?', (time.time() - days * 86400,)
+            )
+            return cursor.rowcount
 
 class FALCONAssistant:
     """Main FALCON Assistant with OpenAI tool calling"""
-    
-    def __init__(self):
-        self.task_executor = FalconAI()
+
+    CHAT_MODEL = "llama-3.3-70b-versatile"
+    # Most past turns considered for every request
+    HISTORY_TURNS = 20
+    # Newest turns sent verbatim; the rest of the window feeds the summary
+    VERBATIM_TURNS = 6
+    # Older turns recalled from semantic memory per request
+    RECALL_TURNS = 4
+    RECALL_MIN_SCORE = 0.3
+    # Cheaper model used to fold old turns into the rolling summary
+    SUMMARY_MODEL = "llama-3.1-8b-instant"
+    # Seconds each tool may run before its result is reported as timed out
+    TOOL_TIMEOUTS = {
+        "execute_system_task": 60,
+        "generate_image": 120,
+        "write_content": 180
+    }
+    DEFAULT_TOOL_TIMEOUT = 60
+    TOOL_WORKERS = 4
+    # Answers for tool-only turns, filled from each call's arguments; they
+    # replace the second completion when every tool call succeeded
+    TOOL_CONFIRMATIONS = {
+        "execute_system_task": "✅ Done: {task_description}.",
+        "generate_image": "🎨 Generating your image of {prompt} now, I'll let you know when it's ready.",
+        "write_content": "✍️ Writing {topic} now, I'll let you know when it's saved."
+    }
+    TOOL_FAILURE = re.compile(r"\bfailed\b|did not finish|Unknown function")
+    # How tool-only turns are answered: 'llm' waits for a second completion,
+    # 'template' answers from TOOL_CONFIRMATIONS, 'background' answers from
+    # the template and then stores the LLM's wording once it arrives
+    TOOL_CONFIRMATION_MODES = ("llm", "template", "background")
+
+    def __init__(self, context_token_budget=3000, tool_confirmation=None):
+        """
+        Args:
+            context_token_budget (int): Token budget for conversation history
+            tool_confirmation (str, optional): One of TOOL_CONFIRMATION_MODES;
+                defaults to FALCON_TOOL_CONFIRMATION or 'template'
+        """
+        self.tool_confirmation = tool_confirmation or os.getenv("FALCON_TOOL_CONFIRMATION", "template")
+        if self.tool_confirmation not in self.TOOL_CONFIRMATION_MODES:
+            raise ValueError(f"Unknown tool confirmation mode '{self.tool_confirmation}'")
+        self.background_tasks = set()
         self.db = FALCONDatabase()
-        
+        self.task_executor = FalconAI(code_cache=self.db)
+
+        # Recent turns are served from memory; SQLite is only read on cold
+        # start. Answers are recorded and rephrased on worker threads, so
+        # every access to the deque holds turns_lock
+        self.turns_lock = threading.Lock()
+        self.recent_turns = deque(self.db.get_recent_turns(self.HISTORY_TURNS),
+                                  maxlen=self.HISTORY_TURNS)
+        self.context_builder = ContextBuilder(
+            self.db, self.summarize_turns, token_budget=context_token_budget,
+            max_turns=self.VERBATIM_TURNS
+        )
+        self.intent_router = IntentRouter()
+        self.response_cache = ResponseCache()
+        self.runtime = get_runtime()
+        # Tools get their own bounded pool: a timed-out tool keeps its thread
+        # until it returns, and must not starve the per-turn database calls
+        # that run on the loop's default executor
+        self.tool_executor = ThreadPoolExecutor(max_workers=self.TOOL_WORKERS, thread_name_prefix="falcon-tool")
+
+        # Per-stage timings; kept in memory and, unless disabled, in the database
+        self.tracer = get_tracer()
+        if persistence_enabled():
+            self.db.purge_spans()
+            self.tracer.persist_to(self.db.save_spans)
+
+        # Semantic memory opens (numpy, vector files, backfill) on its own
+        # thread; turns are indexed there too, in the order they complete
+        self.memory = None
+        self.memory_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="falcon-memory")
+        self.memory_executor.submit(self.open_memory)
+
+        # Image and content generation run as background jobs; the tool
+        # call returns a job id and the answer doesn't wait for the work.
+        # Jobs a previous run left unfinished are only picked up when the
+        # app calls jobs.resume(), once its listeners are attached
+        self.jobs = JobManager(self.db, {
+            "generate_image": self.run_image_job,
+            "write_content": self.run_content_job
+        })
+        self.db.purge_jobs()
+
         # Define available tools
         self.tools = [
             {
@@ -252,27 +784,76 @@ Always be helpful, concise, and focus on what the user needs. Use tools when app
     def execute_system_task(self, task_description):
         """Execute system task using TaskExecutor"""
         try:
-            result = self.task_executor.run_task(task_description)
+            error = self.task_executor.run_task(task_description)
+            if error:
+                return f"Task execution failed: {error}"
             return "Task executed successfully."
         except Exception as e:
             return f"Task execution failed: {str(e)}"
 
     def generate_image(self, prompt):
-        """Generate image using ImageGen"""
+        """Queue image generation as a background job"""
         try:
-            ImageGenMain(prompt)
-            return "Image generated successfully and opened for viewing."
+            job_id = self.jobs.submit("generate_image", {"prompt": prompt}, "Image queued")
+            return f"Image generation started in the background (job {job_id}). The user will be notified when it is ready."
         except Exception as e:
             return f"Image generation failed: {str(e)}"
 
     def write_content(self, topic):
-        """Generate content using Coder"""
+        """Queue content generation as a background job"""
         try:
-            Coder(topic)
-            return "Content generated successfully and saved to file."
+            job_id = self.jobs.submit("write_content", {"topic": topic}, "Content queued")
+            return f"Content generation started in the background (job {job_id}). The user will be notified when it is saved."
         except Exception as e:
             return f"Content generation failed: {str(e)}"
 
+    def run_image_job(self, payload, progress):
+        """Job handler: generate an image with ImageGen, or reuse a stored one, and open it"""
+        from Backend.ImageGen import ImageGen, OpenImage
+        progress(0.1, "Generating image")
+        image = ImageGen(payload["prompt"])
+        progress(0.9, "Opening image")
+        OpenImage(image["path"])
+        message = "Image ready from the gallery" if image["cached"] else "Image generated"
+        return {"message": f"{message} and opened for viewing.",
+                "path": image["path"], "key": image["key"], "cached": image["cached"]}
+
+    def run_content_job(self, payload, progress):
+        """Job handler: stream content from Coder into its own file, pushing chunks to listeners"""
+        from Backend.Automation import Coder
+        progress(0.05, "Writing content")
+        written = 0
+
+        def on_chunk(text):
+            nonlocal written
+            written += len(text)
+            progress(chunk=text)
+
+        path = Coder(payload["topic"], on_chunk=on_chunk)
+        return {"message": f"Content generated ({written} characters) and saved to file.",
+                "path": os.path.abspath(path)}
+
+    def get_jobs(self, limit=20):
+        """Recent background jobs, newest first"""
+        return self.jobs.list(limit)
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def get_images(self, limit=20):
+        """Stored generated images, most recently used first"""
+        from Backend.ImageGen import get_image_store
+        return get_image_store().list(limit)
+
+    def get_image_thumbnail(self, key):
+        from Backend.ImageGen import get_image_store
+        return get_image_store().thumbnail_data_url(key)
+
+    def get_image_cache_stats(self):
+        """Hit/miss counters and size of the generated-image store"""
+        from Backend.ImageGen import get_image_store
+        return get_image_store().stats()
+
     def execute_tool_call(self, tool_call):
         """Execute a specific tool call"""
         function_name = tool_call.function.name
@@ -287,14 +868,150 @@ Always be helpful, concise, and focus on what the user needs. Use tools when app
         else:
             return "Unknown function called."
 
-    def process_message(self, user_input):
-        """Process user message with OpenAI tool calling"""
+    async def aexecute_tool_call(self, tool_call):
+        """Run one tool handler on the tool pool, keeping the current trace span"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.tool_executor, contextvars.copy_context().run, self.execute_tool_call, tool_call
+        )
+
+    async def aexecute_tool_calls(self, tool_calls):
+        """
+        Run tool calls concurrently and return their tool messages in call order
+
+        Each call gets its own timeout from TOOL_TIMEOUTS, so the turn takes
+        as long as the slowest tool rather than the sum of all of them.
+        """
+        async def run(tool_call):
+            name = tool_call.function.name
+            timeout = self.TOOL_TIMEOUTS.get(name, self.DEFAULT_TOOL_TIMEOUT)
+            with self.tracer.span(f"tool.{name}") as span:
+                try:
+                    result = await asyncio.wait_for(self.aexecute_tool_call(tool_call), timeout)
+                except asyncio.TimeoutError:
+                    result = f"{name} did not finish within {timeout} seconds."
+                    span.set(timed_out=True)
+                except Exception as e:
+                    result = f"{name} failed: {str(e)}"
+                    span.set(error=str(e))
+            return {
+                "tool_call_id": tool_call.id,
+                "role": "tool",
+                "content": result
+            }
+
+        return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+
+    async def acreate_completion(self, stream=False, on_delta=None, span_name="llm", **kwargs):
+        """
+        Run a chat completion and return the assistant message
+
+        With stream=True the response is read as it is generated: content
+        deltas are passed to on_delta as they arrive and tool-call fragments
+        are stitched back together, so callers get the same message shape
+        either way. The call is traced as span_name, with the time to the
+        first streamed chunk when streaming.
+        """
+        with self.tracer.span(span_name, model=kwargs.get("model"), stream=stream) as span:
+            return await self._acreate_completion(span, stream, on_delta, **kwargs)
+
+    async def _acreate_completion(self, span, stream, on_delta, **kwargs):
+        aclient = get_async_client()
+        if not stream:
+            response = await aclient.chat.completions.create(**kwargs)
+            return response.choices[0].message
+
+        content = []
+        tool_calls = {}
+        async for chunk in await aclient.chat.completions.create(stream=True, **kwargs):
+            if not chunk.choices:
+                continue
+            if "first_chunk_ms" not in span.attrs:
+                span.set(first_chunk_ms=span.elapsed_ms())
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content.append(delta.content)
+                if on_delta:
+                    on_delta(delta.content)
+
+            # Tool calls arrive in fragments keyed by index: the id and name
+            # come first, the JSON arguments are spread over later chunks
+            for fragment in delta.tool_calls or []:
+                call = tool_calls.setdefault(fragment.index, SimpleNamespace(
+                    id=None, type="function",
+                    function=SimpleNamespace(name="", arguments="")
+                ))
+                if fragment.id:
+                    call.id = fragment.id
+                if fragment.function:
+                    if fragment.function.name:
+                        call.function.name += fragment.function.name
+                    if fragment.function.arguments:
+                        call.function.arguments += fragment.function.arguments
+
+        return SimpleNamespace(
+            content="".join(content),
+            tool_calls=[tool_calls[index] for index in sorted(tool_calls)] or None
+        )
+
+    def process_message(self, user_input, stream=False, on_delta=None):
+        """
+        Process user message with OpenAI tool calling
+
+        Synchronous entry point: runs aprocess_message on the core event
+        loop and waits for the answer. on_delta is called from the loop thread.
+
+        Args:
+            user_input (str): The user's message
+            stream (bool): Stream the answer instead of waiting for the full completion
+            on_delta (callable, optional): Receives each text delta while streaming
+
+        Returns:
+            str: The complete answer
+        """
+        return self.runtime.run(self.aprocess_message(user_input, stream, on_delta))
+
+    async def aprocess_message(self, user_input, stream=False, on_delta=None):
+        """Process user message with OpenAI tool calling on the core event loop"""
+        with self.tracer.span("turn", stream=stream) as turn:
+            answer, path = await self._aprocess_message(user_input, stream, on_delta)
+            turn.set(path=path)
+            return answer
+
+    async def _aprocess_message(self, user_input, stream, on_delta):
+        """Answer a message; returns (answer, path taken) so the turn span can be labelled"""
+        tracer = self.tracer
         try:
             # Add conversation to database
-            conversation_id = self.db.add_conversation(user_input)
+            with tracer.span("db.insert"):
+                conversation_id = await asyncio.to_thread(self.db.add_conversation, user_input)
             
-            # Get conversation history
-            messages = self.db.get_conversation_history(limit=20)
+            # Routine commands are handled locally without any LLM round trip
+            with tracer.span("intent"):
+                answer = await asyncio.to_thread(self.try_local_intent, user_input)
+            if answer:
+                if on_delta:
+                    on_delta(answer)
+                await self.arecord_response(conversation_id, user_input, answer)
+                return answer, "intent"
+            
+            # Get conversation history, with relevant older turns recalled
+            with tracer.span("history") as span:
+                recalled = await asyncio.to_thread(self.recall_turns, user_input)
+                messages = self.get_recent_messages(recalled)
+                span.set(recalled=len(recalled), messages=len(messages))
+
+            # A repeated question in the same context is answered from cache
+            with tracer.span("cache.lookup") as span:
+                cache_key = await asyncio.to_thread(self.response_fingerprint, user_input, recalled)
+                answer = await asyncio.to_thread(self.response_cache.get, user_input, cache_key)
+                span.set(hit=bool(answer))
+            if answer:
+                if on_delta:
+                    on_delta(answer)
+                await self.arecord_response(conversation_id, user_input, answer)
+                return answer, "cache"
             
             # Get real-time information
             time_info = self.get_real_time_info()
@@ -306,8 +1023,11 @@ Always be helpful, concise, and focus on what the user needs. Use tools when app
             ] + messages + [{"role": "user", "content": user_input}]
             
             # First API call to check for tool usage
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
+            response_message = await self.acreate_completion(
+                stream=stream,
+                on_delta=on_delta,
+                span_name="llm.first",
+                model=self.CHAT_MODEL,
                 messages=api_messages,
                 tools=self.tools,
                 tool_choice="auto",
@@ -316,19 +1036,11 @@ Always be helpful, concise, and focus on what the user needs. Use tools when app
                 top_p=0.9
             )
             
-            response_message = response.choices[0].message
-            
             # Handle tool calls
             if response_message.tool_calls:
                 # Execute tool calls
-                tool_results = []
-                for tool_call in response_message.tool_calls:
-                    result = self.execute_tool_call(tool_call)
-                    tool_results.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "content": result
-                    })
+                with tracer.span("tools", count=len(response_message.tool_calls)):
+                    tool_results = await self.aexecute_tool_calls(response_message.tool_calls)
                 
                 # Add tool call messages to conversation
                 api_messages.append({
@@ -349,37 +1061,238 @@ Always be helpful, concise, and focus on what the user needs. Use tools when app
                 # Add tool results
                 api_messages.extend(tool_results)
                 
+                # A tool-only turn that went through is confirmed from a
+                # template, without another round trip to the LLM
+                answer = None
+                if self.tool_confirmation != "llm" and not (response_message.content or "").strip():
+                    answer = self.confirm_tool_calls(response_message.tool_calls, tool_results)
+                if answer:
+                    if on_delta:
+                        on_delta(answer)
+                    await self.arecord_response(conversation_id, user_input, answer)
+                    if self.tool_confirmation == "background":
+                        self.run_in_background(self.arephrase_response(conversation_id, api_messages))
+                    return answer, "tools.template"
+
                 # Get final response after tool execution
-                final_response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
+                final_message = await self.acreate_completion(
+                    stream=stream,
+                    on_delta=on_delta,
+                    span_name="llm.second",
+                    model=self.CHAT_MODEL,
                     messages=api_messages,
                     max_tokens=1024,
                     temperature=0.7,
                     top_p=0.9
                 )
                 
-                answer = final_response.choices[0].message.content.strip()
+                answer = final_message.content.strip()
+                path = "tools"
             else:
-                # No tools needed, use direct response
+                # No tools needed, use direct response; only these are cached,
+                # since a tool turn has side effects that must run every time
                 answer = response_message.content.strip()
+                await asyncio.to_thread(self.response_cache.put, user_input, cache_key, answer)
+                path = "llm"
             
             # Update database with response
-            self.db.update_assistant_response(conversation_id, answer)
-            return answer
+            await self.arecord_response(conversation_id, user_input, answer)
+            return answer, path
             
         except Exception as e:
             error_msg = f"An error occurred: {str(e)}"
             if 'conversation_id' in locals():
-                self.db.update_assistant_response(conversation_id, error_msg)
-            return error_msg
+                await self.arecord_response(conversation_id, user_input, error_msg)
+            return error_msg, "error"
+
+    def confirm_tool_calls(self, tool_calls, tool_results):
+        """
+        Templated answer for a turn that only called tools
+
+        Returns:
+            str: One confirmation per call, or None if a call failed or has no
+                template, in which case the LLM should answer instead
+        """
+        confirmations = []
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            template = self.TOOL_CONFIRMATIONS.get(tool_call.function.name)
+            if not template or self.TOOL_FAILURE.search(tool_result["content"]):
+                return None
+            try:
+                arguments = json.loads(tool_call.function.arguments)
+                confirmations.append(template.format(**{
+                    name: str(value).strip().rstrip(".") for name, value in arguments.items()
+                }))
+            except (ValueError, KeyError, AttributeError):
+                return None
+        return " ".join(confirmations) or None
+
+    def run_in_background(self, coroutine):
+        """Start a coroutine on the core loop without waiting for it, keeping it referenced until done"""
+        task = asyncio.ensure_future(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def arephrase_response(self, conversation_id, api_messages):
+        """Replace a templated answer with the LLM's own wording once it is generated"""
+        try:
+            message = await self.acreate_completion(
+                span_name="llm.rephrase",
+                model=self.CHAT_MODEL,
+                messages=api_messages,
+                max_tokens=1024,
+                temperature=0.7,
+                top_p=0.9
+            )
+            answer = (message.content or "").strip()
+            if answer:
+                await asyncio.to_thread(self.replace_response, conversation_id, answer)
+        except Exception as e:
+            print(f"Error rephrasing answer {conversation_id}: {e}")
+
+    def replace_response(self, conversation_id, answer):
+        """Overwrite a stored answer, in the database, the in-memory history and semantic memory"""
+        self.db.update_assistant_response(conversation_id, answer)
+        with self.turns_lock:
+            for index, turn in enumerate(self.recent_turns):
+                if turn[0] == conversation_id:
+                    self.recent_turns[index] = (conversation_id, turn[1], answer)
+                    break
+        self.memory_executor.submit(self.reindex_turn, conversation_id)
+
+    def try_local_intent(self, user_input):
+        """Run a high-confidence local intent, or return None to use the LLM"""
+        intent = self.intent_router.match(user_input)
+        if not intent:
+            return None
+        try:
+            return intent.run()
+        except Exception as e:
+            print(f"Local intent '{intent.name}' failed, falling back to LLM: {e}")
+            return None
 
-    def search_messages(self, keyword):
+    def get_recent_messages(self, recalled=()):
+        """History messages for the recent and recalled turns, fitted to the token budget"""
+        with self.turns_lock:
+            recent_turns = list(self.recent_turns)
+        return self.context_builder.build(recent_turns, recalled)
+
+    def open_memory(self):
+        """Open the embedding store next to the database and index any turns it is missing"""
+        try:
+            from Backend.Memory import SemanticMemory
+
+            memory = SemanticMemory(os.path.splitext(self.db.db_path)[0] + '.memory')
+            self.memory = memory
+            self.response_cache.embedder = memory.embedder
+            added = memory.backfill(self.db)
+            if added:
+                print(f"Semantic memory: indexed {added} earlier turns")
+        except Exception as e:
+            print(f"Semantic memory unavailable: {e}")
+
+    def response_fingerprint(self, user_input, recalled):
+        """Response cache fingerprint: model, instructions, recalled turns and, for follow-ups, the last turn"""
+        with self.turns_lock:
+            previous_turn = self.recent_turns[-1] if self.recent_turns else None
+        return self.response_cache.fingerprint(
+            user_input, (self.CHAT_MODEL, self.system_instructions), recalled, previous_turn
+        )
+
+    def get_response_cache_stats(self):
+        """Hit/miss counters for the response cache"""
+        return self.response_cache.stats()
+
+    def index_turn(self, conversation_id, user_input, answer):
+        try:
+            if self.memory:
+                self.memory.add_turns([(conversation_id, user_input, answer)])
+        except Exception as e:
+            print(f"Error indexing turn {conversation_id}: {e}")
+
+    def reindex_turn(self, conversation_id):
+        """Refresh a turn's memory vector after its answer was replaced"""
+        try:
+            if self.memory:
+                turn = self.db.get_turns_by_ids([conversation_id])
+                if turn:
+                    self.memory.update_turn(turn[0])
+        except Exception as e:
+            print(f"Error re-indexing turn {conversation_id}: {e}")
+
+    def recall_turns(self, user_input):
+        """Older turns most relevant to the input, best first, excluding those sent verbatim"""
+        if not self.memory:
+            return []
+        with self.turns_lock:
+            verbatim = [turn[0] for turn in list(self.recent_turns)[-self.VERBATIM_TURNS:]]
+        try:
+            matches = self.memory.search(user_input, self.RECALL_TURNS, self.RECALL_MIN_SCORE, verbatim)
+            return self.memory.get_turns([turn_id for turn_id, _ in matches], self.db)
+        except Exception as e:
+            print(f"Error recalling turns: {e}")
+            return []
+
+    def summarize_turns(self, previous_summary, turns):
+        """Fold older turns into the rolling conversation summary"""
+        transcript = "\n".join(
+            f"User: {user_msg}\nFALCON: {assistant_msg}" for _, user_msg, assistant_msg in turns
+        )
+        response = get_client().chat.completions.create(
+            model=self.SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": "Maintain a compact running summary of a conversation between Utkarsh and his assistant FALCON. Keep facts, preferences, decisions and open tasks. Drop small talk. Reply with the updated summary only, at most 150 words."},
+                {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"}
+            ],
+            max_tokens=300,
+            temperature=0.2
+        )
+        return response.choices[0].message.content.strip()
+
+    def record_response(self, conversation_id, user_input, answer):
+        """Store the answer and keep the in-memory history in step with the database"""
+        self.db.update_assistant_response(conversation_id, answer)
+        with self.turns_lock:
+            self.recent_turns.append((conversation_id, user_input, answer))
+        self.memory_executor.submit(self.index_turn, conversation_id, user_input, answer)
+
+    async def arecord_response(self, conversation_id, user_input, answer):
+        with self.tracer.span("db.record"):
+            await asyncio.to_thread(self.record_response, conversation_id, user_input, answer)
+
+    def get_trace_stats(self, since=None):
+        """p50/p95/p99 per pipeline stage over the spans kept in memory"""
+        return self.tracer.stats(since)
+
+    def get_traces(self, limit=20):
+        """Recent turns and other traces, newest first, with their spans"""
+        return self.tracer.traces(limit)
+
+    def get_code_cache(self):
+        """List cached automation code"""
+        return self.db.list_cached_code()
+
+    def purge_code_cache(self, task_key=None):
+        """Remove cached automation code"""
+        return self.db.purge_cached_code(task_key)
+
+    def search_messages(self, keyword, limit=-1, offset=0):
         """Search conversation history"""
-        return self.db.search_conversations(keyword)
+        return self.db.search_conversations(keyword, limit, offset)
+
+    async def asearch_messages(self, keyword, limit=-1, offset=0):
+        return await asyncio.to_thread(self.search_messages, keyword, limit, offset)
+
+    async def aget_conversation_history(self, limit=None):
+        return await asyncio.to_thread(self.db.get_conversation_history, limit)
+
+    def export_chat_history(self, format='csv', start_date=None, end_date=None, on_progress=None):
+        """Export conversation history to a file"""
+        return self.db.export_conversations(format, start_date, end_date, on_progress=on_progress)
 
-    def export_chat_history(self, format='csv', start_date=None, end_date=None):
-        """Export conversation history"""
-        return self.db.export_conversations(format, start_date, end_date)
+    async def aexport_chat_history(self, format='csv', start_date=None, end_date=None, on_progress=None):
+        return await asyncio.to_thread(self.export_chat_history, format, start_date, end_date, on_progress)
 
 def chat_with_assistant(prompt):
     """Standalone chat function for testing"""
@@ -0,0 +1,183 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# tiktoken may download its BPE file the first time, so it is loaded on
+# first use rather than at import
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+# Fixed per-message cost for the role and separators the chat format adds
+MESSAGE_OVERHEAD = 4
+
+def get_encoding():
+    """tiktoken's cl100k_base encoding, loaded once; None if it is unavailable"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+def count_tokens(text):
+    """
+    Count tokens in a piece of text
+
+    Uses tiktoken when it is installed, otherwise a word/punctuation
+    estimate that stays close to BPE counts for English text.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Token count
+    """
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(max(1, (len(piece) + 3) // 4) for piece in re.findall(r'\w+|[^\w\s]', text))
+
+def count_message_tokens(message):
+    return MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+
+class ContextBuilder:
+    """
+    Fits recent conversation turns into a token budget.
+
+    The newest turns are sent verbatim for as long as they fit, up to
+    max_turns. Older turns recalled from semantic memory come next, in one
+    system message. Everything else is represented by a rolling summary
+    stored in the database, which is folded forward on a background thread
+    so the request path never waits on a summarization call.
+    """
+
+    def __init__(self, db, summarize, token_budget=3000, max_turns=None, recall_share=0.35,
+                 min_new_turns=4, summary_batch=40):
+        """
+        Args:
+            db (FALCONDatabase): Database holding turns and the rolling summary
+            summarize (callable): summarize(previous_summary, turns) -> str
+            token_budget (int): Token budget for history, summary included
+            max_turns (int, optional): Most recent turns sent verbatim
+            recall_share (float): Largest share of the budget recalled turns may use
+            min_new_turns (int): Dropped turns to collect before re-summarizing
+            summary_batch (int): Most turns folded into the summary per pass
+        """
+        self.db = db
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.recall_share = recall_share
+        self.min_new_turns = min_new_turns
+        self.summary_batch = summary_batch
+
+        self.summary, self.covered_until = db.get_summary() or ("", 0)
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="falcon-summary")
+
+    def summary_message(self):
+        if not self.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}
+
+    def recall_message(self, recalled, budget):
+        """System message with the recalled turns that fit in budget, best first"""
+        lines = []
+        cost = count_message_tokens({"content": "Relevant earlier exchanges:"})
+        for _, user_msg, assistant_msg in recalled:
+            line = f"User: {user_msg}\nFALCON: {assistant_msg}"
+            line_cost = count_tokens(line) + 1
+            if cost + line_cost > budget:
+                continue
+            cost += line_cost
+            lines.append(line)
+        if not lines:
+            return None
+        return {"role": "system", "content": "Relevant earlier exchanges:\n" + "\n\n".join(lines)}
+
+    def build(self, turns, recalled=()):
+        """
+        Assemble history messages for a request
+
+        Args:
+            turns (list): (id, user, assistant) tuples, oldest first
+            recalled (list): Older (id, user, assistant) turns relevant to the request, best first
+
+        Returns:
+            list: Chat messages that fit within the token budget
+        """
+        summary_message = self.summary_message()
+        remaining = self.token_budget
+        if summary_message:
+            remaining -= count_message_tokens(summary_message)
+
+        recall_message = None
+        if recalled:
+            recall_message = self.recall_message(recalled, int(self.token_budget * self.recall_share))
+            if recall_message:
+                remaining -= count_message_tokens(recall_message)
+
+        included = []
+        for turn in reversed(turns):
+            if self.max_turns is not None and len(included) >= self.max_turns:
+                break
+            turn_messages = self._turn_messages(turn)
+            cost = sum(count_message_tokens(m) for m in turn_messages)
+            if cost > remaining:
+                break
+            remaining -= cost
+            included.append(turn_messages)
+
+        dropped = turns[:len(turns) - len(included)]
+        self._maybe_refresh(dropped)
+
+        messages = [m for m in (summary_message, recall_message) if m]
+        for turn_messages in reversed(included):
+            messages.extend(turn_messages)
+        return messages
+
+    @staticmethod
+    def _turn_messages(turn):
+        _, user_msg, assistant_msg = turn
+        messages = [{"role": "user", "content": user_msg}]
+        if assistant_msg:
+            messages.append({"role": "assistant", "content": assistant_msg})
+        return messages
+
+    def _maybe_refresh(self, dropped):
+        """Schedule a background summary pass once enough turns fall out of the window"""
+        pending = [turn for turn in dropped if turn[0] > self.covered_until]
+        if not pending:
+            return
+        if self.summary and len(pending) < self.min_new_turns:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._executor.submit(self._refresh, pending[-1][0])
+
+    def _refresh(self, until_id):
+        try:
+            turns = self.db.get_turns_between(self.covered_until, until_id, self.summary_batch)
+            if not turns:
+                return
+            summary = self.summarize(self.summary, turns)
+            if summary:
+                self.db.save_summary(summary, until_id)
+                self.summary, self.covered_until = summary, until_id
+        except Exception as e:
+            print(f"Error refreshing conversation summary: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
@@ -0,0 +1,122 @@
+import os
+import time
+import asyncio
+import threading
+import importlib
+from dotenv import load_dotenv
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# One keep-alive pool per process: connections to Groq are reused across
+# turns instead of paying a TLS handshake for every request
+HTTP_POOL = {"max_connections": 20, "max_keepalive_connections": 10, "keepalive_expiry": 120}
+HTTP_TIMEOUT = {"timeout": 60.0, "connect": 10.0}
+
+# Loaded on the warm-up thread so the UI doesn't wait for them
+WARM_UP_MODULES = (
+    "openai", "Backend.TTS", "Backend.ImageGen", "google.generativeai",
+)
+
+_client = None
+_async_client = None
+_runtime = None
+_lock = threading.Lock()
+
+def get_api_key():
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+    return api_key
+
+def get_client():
+    """Return the shared synchronous Groq client"""
+    global _client
+    with _lock:
+        if _client is None:
+            import httpx
+            from openai import OpenAI
+            _client = OpenAI(
+                base_url=GROQ_BASE_URL,
+                api_key=get_api_key(),
+                http_client=httpx.Client(limits=httpx.Limits(**HTTP_POOL),
+                                         timeout=httpx.Timeout(**HTTP_TIMEOUT))
+            )
+        return _client
+
+def get_async_client():
+    """Return the shared AsyncOpenAI Groq client, bound to the core event loop"""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            _async_client = AsyncOpenAI(
+                base_url=GROQ_BASE_URL,
+                api_key=get_api_key(),
+                http_client=httpx.AsyncClient(limits=httpx.Limits(**HTTP_POOL),
+                                              timeout=httpx.Timeout(**HTTP_TIMEOUT))
+            )
+        return _async_client
+
+class AsyncRuntime:
+    """
+    Event loop running on its own thread.
+
+    The assistant core lives here; synchronous callers such as Eel handlers
+    submit coroutines and get a concurrent.futures.Future back, so several
+    requests can be in flight at once.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="falcon-core", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the loop and return a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the loop and block until it finishes"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("AsyncRuntime.run() called from the core loop; await the coroutine instead")
+        return self.submit(coroutine).result(timeout)
+
+def get_runtime():
+    """Return the shared core runtime, starting its thread on first use"""
+    global _runtime
+    with _lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
+
+def warm_up(modules=WARM_UP_MODULES, on_ready=None):
+    """
+    Import heavy modules and build shared clients on a background thread
+
+    Anything a request needs before warm-up reaches it is simply imported
+    on first use; Python's import lock makes the two paths safe together.
+    """
+    def run():
+        started = time.perf_counter()
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"Warm-up: could not import {module}: {e}")
+        try:
+            get_client()
+            get_async_client()
+        except Exception as e:
+            print(f"Warm-up: could not create API clients: {e}")
+        if on_ready:
+            on_ready(time.perf_counter() - started)
+
+    thread = threading.Thread(target=run, name="falcon-warm-up", daemon=True)
+    thread.start()
+    return thread
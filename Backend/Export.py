@@ -0,0 +1,142 @@
+import os
+import csv
+import json
+import datetime
+
+EXPORT_DIR = "Database/Exports"
+COLUMNS = ("id", "user", "assistant", "timestamp")
+
+# Rows pulled from the cursor and written per step; memory use stays
+# bounded by this no matter how long the history is
+CHUNK_SIZE = 500
+
+class CsvExportWriter:
+    extension = ".csv"
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+class JsonlExportWriter:
+    extension = ".jsonl"
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_rows(self, rows):
+        self.file.writelines(
+            json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+class XlsxExportWriter:
+    """
+    XLSX writer in XlsxWriter's constant-memory mode.
+
+    Each row is flushed to the sheet's temp file as soon as the next one
+    starts, so only one row is ever held. Cell text is written verbatim:
+    a message starting with '=' or containing a URL stays plain text.
+    """
+
+    extension = ".xlsx"
+    # Excel's per-sheet row limit, header included
+    MAX_ROWS = 1048576
+
+    def __init__(self, path):
+        # Only needed for exports, so it isn't loaded at start-up
+        import xlsxwriter
+
+        self.workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "strings_to_numbers": False,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+        })
+        self.header_format = self.workbook.add_format({"bold": True})
+        self.sheets = 0
+        self.new_sheet()
+
+    def new_sheet(self):
+        self.sheets += 1
+        name = "Conversations" if self.sheets == 1 else f"Conversations {self.sheets}"
+        self.sheet = self.workbook.add_worksheet(name)
+        self.sheet.set_column(0, 0, 8)
+        self.sheet.set_column(1, 2, 60)
+        self.sheet.set_column(3, 3, 20)
+        self.sheet.write_row(0, 0, COLUMNS, self.header_format)
+        self.row = 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.row >= self.MAX_ROWS:
+                self.new_sheet()
+            self.sheet.write_row(self.row, 0, row)
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+EXPORT_WRITERS = {
+    "csv": CsvExportWriter,
+    "jsonl": JsonlExportWriter,
+    "xlsx": XlsxExportWriter,
+    "excel": XlsxExportWriter,
+}
+
+def default_export_path(format):
+    """Timestamped file name in EXPORT_DIR for a new export"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(EXPORT_DIR, f"FALCON_chat_{stamp}{EXPORT_WRITERS[format].extension}")
+
+def stream_export(cursor, path, format="csv", total=None, chunk_size=CHUNK_SIZE, on_progress=None):
+    """
+    Write the rows of an open cursor to a file, one chunk at a time
+
+    The file is written under a temporary name and moved into place once
+    complete, so a failed export never leaves a truncated file behind.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor over (id, user, assistant, timestamp) rows
+        path (str): Destination file
+        format (str): One of EXPORT_WRITERS
+        total (int, optional): Expected row count, passed on to on_progress
+        chunk_size (int): Rows fetched and written per step
+        on_progress (callable, optional): Called with (rows_written, total) after each chunk
+
+    Returns:
+        int: Number of rows written
+    """
+    if format not in EXPORT_WRITERS:
+        raise ValueError(f"Unsupported export format '{format}'")
+
+    partial_path = path + ".part"
+    written = 0
+    try:
+        writer = EXPORT_WRITERS[format](partial_path)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.write_rows(rows)
+                written += len(rows)
+                if on_progress:
+                    on_progress(written, total)
+        finally:
+            writer.close()
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return written
@@ -1,27 +1,227 @@
 import os
+import json
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
 import pollinations
 from PIL import Image
+from Backend.Tracing import get_tracer
+
+MODEL = "flux-cablyai"
+WIDTH = 1024
+HEIGHT = 1024
+SEED = 0
+NEGATIVE = "Anime, cartoony, childish, low quality, blurry, bad anatomy, bad hands, text, watermark"
+THUMBNAIL_SIZE = (256, 256)
+
+class ImageStore:
+    """
+    Content-addressed store of generated images.
+
+    Entries are keyed by a hash of (prompt, negative, model, size, seed) and
+    kept under Database/Images as the full PNG, a small JPEG thumbnail for
+    the UI and a JSON sidecar with the generation parameters. The store is
+    bounded in bytes with least-recently-used eviction; file mtimes carry
+    the LRU order across restarts.
+    """
+
+    def __init__(self, store_dir="Database/Images", max_bytes=256 * 1024 * 1024):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(prompt, negative=NEGATIVE, model=MODEL, width=WIDTH, height=HEIGHT, seed=SEED):
+        params = json.dumps([prompt, negative, model, width, height, seed], ensure_ascii=False)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+    def paths_for(self, key):
+        base = os.path.join(self.store_dir, key)
+        return {"image": f"{base}.png", "thumbnail": f"{base}_thumb.jpg", "meta": f"{base}.json"}
+
+    def _entry_size(self, key):
+        return sum(os.path.getsize(path) for path in self.paths_for(key).values() if os.path.exists(path))
+
+    def _load_index(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.store_dir):
+            if entry.name.endswith(".part.png"):
+                # Left behind by a generation that never finished
+                os.remove(entry.path)
+            elif entry.is_file() and entry.name.endswith(".png") and len(entry.name) == 68:
+                key = entry.name[:-4]
+                entries.append((entry.stat().st_mtime, key, self._entry_size(key)))
+        # Oldest first, so the front of the dict is the next to evict
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, key):
+        """Paths and parameters of a stored image, or None"""
+        with self._lock:
+            stored = key in self._entries
+        paths = self.paths_for(key)
+        if stored and os.path.exists(paths["image"]):
+            os.utime(paths["image"])
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return self._describe(key)
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+            self.misses += 1
+        return None
+
+    def put(self, key, source_path, params):
+        """
+        Move a freshly generated image into the store
+
+        Args:
+            key (str): Key from make_key()
+            source_path (str): Generated image file; it is moved, not copied
+            params (dict): Generation parameters saved alongside
+
+        Returns:
+            dict: Same shape as get()
+        """
+        paths = self.paths_for(key)
+        with Image.open(source_path) as image:
+            image.load()
+            is_png = image.format == "PNG"
+            if not is_png:
+                image.save(paths["image"], "PNG")
+            thumbnail = image.convert("RGB")
+        if is_png:
+            os.replace(source_path, paths["image"])
+        else:
+            os.remove(source_path)
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        thumbnail.save(paths["thumbnail"], "JPEG", quality=80)
+        with open(paths["meta"], "w", encoding="utf-8") as f:
+            json.dump(params, f, ensure_ascii=False)
+
+        size = self._entry_size(key)
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict(keep=key)
+        return self._describe(key)
+
+    def _describe(self, key):
+        paths = self.paths_for(key)
+        try:
+            with open(paths["meta"], encoding="utf-8") as f:
+                params = json.load(f)
+        except (OSError, ValueError):
+            params = {}
+        return {
+            "key": key,
+            "path": os.path.abspath(paths["image"]),
+            "thumbnail": os.path.abspath(paths["thumbnail"]),
+            "params": params,
+        }
+
+    def _evict(self, keep=None):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._bytes -= size
+            for path in self.paths_for(key).values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def thumbnail_data_url(self, key):
+        """Thumbnail as a data: URL the UI can show directly, or None"""
+        try:
+            with open(self.paths_for(key)["thumbnail"], "rb") as f:
+                return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode("ascii")
+        except OSError:
+            return None
+
+    def list(self, limit=20):
+        """Most recently used images first"""
+        with self._lock:
+            keys = list(reversed(self._entries))[:limit]
+        return [self._describe(key) for key in keys]
+
+    def stats(self):
+        """Lookup hit/miss counters, stored entries and their total bytes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+_image_store = None
+_image_store_lock = threading.Lock()
+
+def get_image_store():
+    """Return the shared image store, loading its index on first use"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            _image_store = ImageStore()
+        return _image_store
+
+def ImageGen(prompt, negative=NEGATIVE, model=MODEL, width=WIDTH, height=HEIGHT, seed=SEED):
+    """
+    Generate an image, or return the stored one for the same parameters
+
+    Returns:
+        dict: key, path, thumbnail, params and whether it came from the store
+    """
+    with get_tracer().span("image.generate", model=model) as span:
+        image = _generate(prompt, negative, model, width, height, seed)
+        span.set(cached=image["cached"])
+        return image
+
+def _generate(prompt, negative, model, width, height, seed):
+    store = get_image_store()
+    key = store.make_key(prompt, negative, model, width, height, seed)
+    image = store.get(key)
+    if image:
+        return {**image, "cached": True}
 
-def ImageGen(prompt):
     image_model: pollinations.ImageModel = pollinations.image(
-        model = "flux-cablyai",
-        seed = 0,
-        width = 1024,
-        height = 1024,
+        model = model,
+        seed = seed,
+        width = width,
+        height = height,
         enhance = False,
         nologo = False,
         private = False,
     )
 
+    partial_path = os.path.join(store.store_dir, f"{key}.{threading.get_ident()}.part.png")
     image_model.generate(
         prompt = prompt,
-        negative = "Anime, cartoony, childish, low quality, blurry, bad anatomy, bad hands, text, watermark",
+        negative = negative,
         save = True,
-        file = "Database/Image.png",
+        file = partial_path,
     )
 
-def OpenImage():
-    image_path = "Database/Image.png"
+    params = {"prompt": prompt, "negative": negative, "model": model,
+              "width": width, "height": height, "seed": seed}
+    return {**store.put(key, partial_path, params), "cached": False}
+
+def OpenImage(image_path):
     if os.path.exists(image_path):
         image = Image.open(image_path)
         image.show()
@@ -30,5 +230,7 @@ def OpenImage():
 
 def Main(newprompt):
     prompt = newprompt
-    ImageGen(prompt)
-    OpenImage()
\ No newline at end of file
+    with get_tracer().span("image.main"):
+        image = ImageGen(prompt)
+        OpenImage(image["path"])
+    return image
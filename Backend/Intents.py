@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import datetime
+import subprocess
+import webbrowser
+from urllib.parse import quote_plus
+
+# Websites opened directly in the browser
+WEBSITES = {
+    "google": "https://www.google.com",
+    "youtube": "https://www.youtube.com",
+    "gmail": "https://mail.google.com",
+    "github": "https://github.com",
+    "instagram": "https://www.instagram.com",
+    "facebook": "https://www.facebook.com",
+    "twitter": "https://twitter.com",
+    "x": "https://x.com",
+    "linkedin": "https://www.linkedin.com",
+    "reddit": "https://www.reddit.com",
+    "whatsapp": "https://web.whatsapp.com",
+    "chatgpt": "https://chat.openai.com",
+    "netflix": "https://www.netflix.com",
+    "amazon": "https://www.amazon.com",
+    "wikipedia": "https://www.wikipedia.org",
+    "stackoverflow": "https://stackoverflow.com",
+}
+
+# Desktop applications: spoken name -> (launch command per platform, process
+# names on any platform, lower-case without ".exe"). Apps without process
+# names are never closed here: explorer.exe is also the Windows shell and
+# taskbar, and a terminal may be the one running FALCON
+APPLICATIONS = {
+    "chrome": ({"nt": "chrome", "darwin": "Google Chrome", "posix": "google-chrome"}, {"chrome", "google chrome"}),
+    "google chrome": ({"nt": "chrome", "darwin": "Google Chrome", "posix": "google-chrome"}, {"chrome", "google chrome"}),
+    "firefox": ({"nt": "firefox", "darwin": "Firefox", "posix": "firefox"}, {"firefox"}),
+    "edge": ({"nt": "msedge", "darwin": "Microsoft Edge", "posix": "microsoft-edge"}, {"msedge", "microsoft edge"}),
+    "notepad": ({"nt": "notepad", "darwin": "TextEdit", "posix": "gedit"}, {"notepad", "textedit", "gedit"}),
+    "calculator": ({"nt": "calc", "darwin": "Calculator", "posix": "gnome-calculator"},
+                   {"calc", "calculatorapp", "calculator", "gnome-calculator"}),
+    "vs code": ({"nt": "code", "darwin": "Visual Studio Code", "posix": "code"}, {"code"}),
+    "vscode": ({"nt": "code", "darwin": "Visual Studio Code", "posix": "code"}, {"code"}),
+    "spotify": ({"nt": "spotify", "darwin": "Spotify", "posix": "spotify"}, {"spotify"}),
+    "telegram": ({"nt": "telegram", "darwin": "Telegram", "posix": "telegram-desktop"}, {"telegram", "telegram-desktop"}),
+    "discord": ({"nt": "discord", "darwin": "Discord", "posix": "discord"}, {"discord"}),
+    "explorer": ({"nt": "explorer", "darwin": "Finder", "posix": "nautilus"}, None),
+    "file explorer": ({"nt": "explorer", "darwin": "Finder", "posix": "nautilus"}, None),
+    "terminal": ({"nt": "cmd", "darwin": "Terminal", "posix": "gnome-terminal"}, None),
+    "paint": ({"nt": "mspaint", "darwin": "Preview", "posix": "pinta"}, {"mspaint", "pinta"}),
+}
+
+# Courtesy words that don't change what is being asked
+FILLER = re.compile(r"^(?:hey |ok |okay )?(?:falcon[, ]+)?(?:please |can you |could you |would you )*|(?: please| for me| now)+[.!?]*$")
+
+# Words that make a bare "play X" a request for music rather than a game
+# or a follow-up
+MUSIC_CUE = re.compile(r"\b(?:song|songs|music|by|album|track|playlist|remix|lofi|lyrics)\b")
+
+# Anything that looks like more than one command goes to the LLM
+COMPOUND = re.compile(r"\b(?:and|then|also|after that)\b|[,;]")
+
+class IntentMatch:
+    """A recognized command with the confidence of the match"""
+
+    def __init__(self, name, confidence, handler, argument=None):
+        self.name = name
+        self.confidence = confidence
+        self.handler = handler
+        self.argument = argument
+
+    def run(self):
+        return self.handler(self.argument)
+
+class IntentRouter:
+    """
+    Deterministic matcher for routine commands.
+
+    Recognizes opening/closing apps and websites, playing on YouTube, web
+    searches and time/date questions, and runs prebuilt handlers for them
+    directly. Anything ambiguous scores below the threshold and is left to
+    the LLM.
+    """
+
+    def __init__(self, threshold=0.85):
+        self.threshold = threshold
+        self.patterns = [
+            (re.compile(r"^(?:what(?:'?s| is) the )?(?:current )?time(?: is it)?(?: now)?\??$|^what time is it\??$"),
+             "time", self.tell_time),
+            (re.compile(r"^(?:what(?:'?s| is) )?(?:today'?s |the )?(?:date|day)(?: today)?\??$|^what day is (?:it|today)\??$"),
+             "date", self.tell_date),
+            (re.compile(r"^play (?P<arg>.+?) on youtube$|^play (?P<bare>.+)$"),
+             "play_youtube", self.play_on_youtube),
+            (re.compile(r"^(?P<verb>search|google|look up)(?: for)? (?P<arg>.+?)"
+                        r"(?P<engine> on google| online| on the web| on the internet)?$"),
+             "web_search", self.web_search),
+            (re.compile(r"^(?:open|launch|start) (?:the )?(?P<arg>.+?)(?: app| application| website)?$"),
+             "open", self.open_target),
+            (re.compile(r"^(?:close|quit|exit|kill) (?:the )?(?P<arg>.+?)(?: app| application)?$"),
+             "close", self.close_application),
+        ]
+
+    @staticmethod
+    def normalize(text):
+        text = re.sub(r"\s+", " ", (text or "").strip().lower())
+        return FILLER.sub("", text).strip(" .!")
+
+    def match(self, text):
+        """
+        Match a user utterance against the known commands
+
+        Args:
+            text (str): Raw user input
+
+        Returns:
+            Optional[IntentMatch]: Match at or above the threshold, or None
+        """
+        utterance = self.normalize(text)
+        if not utterance or COMPOUND.search(utterance):
+            return None
+
+        for pattern, name, handler in self.patterns:
+            found = pattern.match(utterance)
+            if not found:
+                continue
+            groups = found.groupdict()
+            argument = groups.get("arg") or groups.get("bare")
+            confidence = self.score(name, argument, groups)
+            if confidence >= self.threshold:
+                return IntentMatch(name, confidence, handler, argument)
+            return None
+        return None
+
+    def score(self, name, argument, groups=None):
+        groups = groups or {}
+        if name in ("time", "date"):
+            return 1.0
+        if not argument:
+            return 0.0
+        if name == "open":
+            return 1.0 if argument in WEBSITES or argument in APPLICATIONS else 0.5
+        if name == "close":
+            return 1.0 if argument in APPLICATIONS and APPLICATIONS[argument][1] else 0.5
+        # "play it again", "play a game with me": only music is played blind
+        if name == "play_youtube" and groups.get("bare") and not MUSIC_CUE.search(argument):
+            return 0.6
+        # "look up my calendar" is not a web search unless the web is named
+        if name == "web_search" and groups.get("verb") == "look up" and not groups.get("engine"):
+            return 0.6
+        # Short free-text arguments are unambiguous; long ones are probably prose
+        return 0.95 if len(argument.split()) <= 8 else 0.6
+
+    def tell_time(self, _=None):
+        return f"🕒 It's {datetime.datetime.now().strftime('%I:%M %p').lstrip('0')}."
+
+    def tell_date(self, _=None):
+        return f"📅 Today is {datetime.datetime.now().strftime('%A, %d %B %Y')}."
+
+    def play_on_youtube(self, query):
+        try:
+            import pywhatkit
+            pywhatkit.playonyt(query)
+        except Exception:
+            webbrowser.open(f"https://www.youtube.com/results?search_query={quote_plus(query)}")
+        return f"🎵 Playing {query} on YouTube."
+
+    def web_search(self, query):
+        webbrowser.open(f"https://www.google.com/search?q={quote_plus(query)}")
+        return f"🔎 Searching Google for {query}."
+
+    def open_target(self, target):
+        if target in WEBSITES:
+            webbrowser.open(WEBSITES[target])
+            return f"🌐 {target.title()} is now open."
+
+        commands, _ = APPLICATIONS[target]
+        platform = "darwin" if sys.platform == "darwin" else os.name
+        command = commands[platform]
+        if os.name == "nt":
+            subprocess.Popen(f'start "" {command}', shell=True)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", "-a", command])
+        else:
+            subprocess.Popen([command], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+        return f"🚀 {target.title()} is now open."
+
+    def close_application(self, target):
+        import psutil
+
+        _, process_names = APPLICATIONS[target]
+        # Never this process or whatever started it, e.g. its terminal
+        own = psutil.Process()
+        protected = {own.pid} | {parent.pid for parent in own.parents()}
+        closed = 0
+        for proc in psutil.process_iter(['name']):
+            try:
+                name = (proc.info['name'] or '').lower()
+                if name.endswith('.exe'):
+                    name = name[:-4]
+                if name in process_names and proc.pid not in protected:
+                    proc.terminate()
+                    closed += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+        if not closed:
+            return f"{target.title()} isn't running."
+        return f"✅ {target.title()} is closed."
@@ -0,0 +1,127 @@
+import json
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from Backend.Tracing import get_tracer
+
+class JobManager:
+    """
+    Background queue for slow tool work such as image and content generation.
+
+    submit() stores the job and returns its id straight away; a worker pool
+    runs the matching handler, which reports progress, and optionally
+    streamed output chunks, through a callback.
+    Every state change is written to the database and passed to listeners
+    (the UI bridge), so a restart can pick up queued or interrupted jobs
+    with resume().
+    """
+
+    def __init__(self, db, handlers, max_workers=2):
+        """
+        Args:
+            db (FALCONDatabase): Database holding the jobs table
+            handlers (dict): Job kind -> handler(payload, progress) returning a result dict
+            max_workers (int): Jobs run at the same time
+        """
+        self.db = db
+        self.handlers = handlers
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="falcon-job")
+
+    def add_listener(self, callback):
+        """Call callback(job) on every job update, from the thread making it"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _emit(self, job):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"Job listener failed: {e}")
+
+    def _update(self, job_id, **fields):
+        self.db.update_job(job_id, **fields)
+        job = self.db.get_job(job_id)
+        if job:
+            self._emit(job)
+        return job
+
+    def submit(self, kind, payload, message="Queued"):
+        """
+        Queue a job
+
+        Args:
+            kind (str): One of the registered handler names
+            payload (dict): JSON-serializable arguments for the handler
+            message (str): Initial status text
+
+        Returns:
+            str: The new job's id
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        job_id = uuid.uuid4().hex[:12]
+        self.db.create_job(job_id, kind, json.dumps(payload), message)
+        self._emit(self.db.get_job(job_id))
+        # The job's span joins the trace of the turn that queued it
+        self._executor.submit(contextvars.copy_context().run, self._run, job_id, kind, payload)
+        return job_id
+
+    def resume(self):
+        """
+        Requeue jobs a previous run left queued or running
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        jobs = self.db.get_unfinished_jobs()
+        for job in jobs:
+            if job["kind"] not in self.handlers:
+                self._update(job["id"], status="failed", error=f"Unknown job kind '{job['kind']}'")
+                continue
+            self._update(job["id"], status="queued", progress=0.0, message="Resumed after restart")
+            self._executor.submit(self._run, job["id"], job["kind"], job["payload"])
+        return len(jobs)
+
+    def _run(self, job_id, kind, payload):
+        self._update(job_id, status="running", progress=0.0, message="Started")
+
+        def progress(fraction=None, message=None, chunk=None):
+            fields = {}
+            if fraction is not None:
+                fields["progress"] = max(0.0, min(1.0, float(fraction)))
+            if message:
+                fields["message"] = message
+            if fields:
+                self._update(job_id, **fields)
+            if chunk:
+                # Streamed output goes to listeners only; the result holds the whole
+                self._emit({"id": job_id, "kind": kind, "status": "running", "chunk": chunk})
+
+        try:
+            with get_tracer().span(f"job.{kind}", job_id=job_id):
+                result = self.handlers[kind](payload, progress) or {}
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), message=f"Failed: {e}")
+        else:
+            self._update(job_id, status="done", progress=1.0, result=json.dumps(result),
+                         message=result.get("message", "Done"))
+
+    def get(self, job_id):
+        return self.db.get_job(job_id)
+
+    def list(self, limit=20):
+        return self.db.list_jobs(limit)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
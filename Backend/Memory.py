@@ -0,0 +1,349 @@
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "by",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "i", "me", "my",
+    "you", "your", "we", "do", "does", "did", "can", "could", "would", "will", "please", "so",
+}
+
+def normalize_rows(matrix):
+    """Scale rows to unit length so a dot product is the cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class HashingEmbedder:
+    """
+    Feature-hashing vectorizer over words and word pairs.
+
+    Needs no model and no network: every token is hashed straight to a
+    signed bucket. Retrieval is lexical, but good enough to find earlier
+    turns about the same people, apps and topics.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        """
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            numpy.ndarray: (len(texts), dim) float32 unit vectors
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if h >> 31 else -1.0
+        return normalize_rows(matrix)
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model, loaded from the on-disk cache only"""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, local_files_only=True)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=64, convert_to_numpy=True)
+        return normalize_rows(vectors.astype(np.float32))
+
+def get_embedder(name=None):
+    """
+    Pick the embedder named by FALCON_EMBEDDER
+
+    'hashing' (the default) or a sentence-transformers model already in
+    the local cache. A model that can't be loaded offline falls back to
+    hashing.
+    """
+    load_dotenv()
+    name = name or os.getenv("FALCON_EMBEDDER", "hashing")
+    if name != "hashing":
+        try:
+            return SentenceTransformerEmbedder(name)
+        except Exception as e:
+            print(f"Embedder '{name}' unavailable, using hashing vectorizer: {e}")
+    return HashingEmbedder()
+
+class VectorStore:
+    """
+    Append-only store of unit vectors in memory-mapped files.
+
+    <base>.f32 holds float32 vectors in blocks of BLOCK_ROWS, each block laid
+    out column by column, <base>.ids the int64 conversation id of each row
+    and <base>.json the row count and the embedder that produced them. The
+    column layout lets a sparse query (the hashing embedder sets a handful
+    of buckets) read only the columns it uses instead of the whole matrix.
+    Rows past the recorded count (e.g. after a crash mid-append) are ignored.
+    """
+
+    BLOCK_ROWS = 4096
+    # Blocks scored per matrix product, bounding temporary memory for batches
+    SCAN_BLOCKS = 16
+
+    def __init__(self, base_path, dim, embedder_name):
+        self.base_path = base_path
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.count = 0
+        self.vectors = None
+        self.ids = None
+        self._lock = threading.Lock()
+
+        meta = self._read_meta()
+        if meta.get("dim") != dim or meta.get("embedder") != embedder_name:
+            # Vectors from another embedder aren't comparable; start over
+            self._reset()
+        else:
+            self.count = meta["count"]
+        self._map(max(self._blocks_for(self.count), self._stored_blocks(), 1))
+
+    def _path(self, suffix):
+        return f"{self.base_path}.{suffix}"
+
+    def _read_meta(self):
+        try:
+            with open(self._path("json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self):
+        temp_path = self._path("json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "embedder": self.embedder_name, "count": self.count}, f)
+        os.replace(temp_path, self._path("json"))
+
+    def _reset(self):
+        for suffix in ("f32", "ids", "json"):
+            if os.path.exists(self._path(suffix)):
+                os.remove(self._path(suffix))
+        self.count = 0
+
+    def _blocks_for(self, rows):
+        return -(-rows // self.BLOCK_ROWS)
+
+    def _stored_blocks(self):
+        try:
+            return os.path.getsize(self._path("f32")) // (self.dim * self.BLOCK_ROWS * 4)
+        except OSError:
+            return 0
+
+    def _map(self, blocks):
+        """(Re)map both files at the given block capacity, extending them if needed"""
+        for suffix, block_bytes in (("f32", self.dim * self.BLOCK_ROWS * 4), ("ids", self.BLOCK_ROWS * 8)):
+            with open(self._path(suffix), "ab") as f:
+                if f.tell() < blocks * block_bytes:
+                    f.truncate(blocks * block_bytes)
+        self.vectors = np.memmap(self._path("f32"), dtype=np.float32, mode="r+",
+                                 shape=(blocks, self.dim, self.BLOCK_ROWS))
+        self.ids = np.memmap(self._path("ids"), dtype=np.int64, mode="r+",
+                             shape=(blocks * self.BLOCK_ROWS,))
+
+    def append(self, ids, vectors):
+        """Add rows, flushing them before the new count is recorded"""
+        with self._lock:
+            needed = self.count + len(ids)
+            if needed > len(self.ids):
+                blocks = max(self._blocks_for(needed), len(self.vectors) * 2)
+                self.vectors.flush()
+                self.ids.flush()
+                # Windows can't extend a file that is still mapped
+                self.vectors = self.ids = None
+                self._map(blocks)
+            for row, vector in enumerate(vectors, self.count):
+                block, column = divmod(row, self.BLOCK_ROWS)
+                self.vectors[block, :, column] = vector
+            self.ids[self.count:needed] = ids
+            self.vectors.flush()
+            self.ids.flush()
+            self.count = needed
+            self._write_meta()
+
+    def replace(self, row_id, vector):
+        """
+        Overwrite the stored vector of an id in place
+
+        Returns:
+            bool: False if the id isn't stored
+        """
+        with self._lock:
+            rows = np.flatnonzero(self.ids[:self.count] == row_id)
+            for row in rows:
+                block, column = divmod(int(row), self.BLOCK_ROWS)
+                self.vectors[block, :, column] = vector
+            self.vectors.flush()
+            return len(rows) > 0
+
+    def stored_ids(self):
+        with self._lock:
+            return np.array(self.ids[:self.count])
+
+    def search(self, queries, k=5):
+        """
+        Cosine top-k for a batch of unit query vectors
+
+        Args:
+            queries (numpy.ndarray): (q, dim) or (dim,) unit vectors
+            k (int): Results per query
+
+        Returns:
+            list: One list of (id, score) pairs per query, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        # Only the dimensions some query uses contribute to the dot product
+        used = np.flatnonzero(np.any(queries != 0, axis=0))
+
+        with self._lock:
+            count = self.count
+            if count == 0 or k <= 0:
+                return [[] for _ in queries]
+            k = min(k, count)
+            blocks = self._blocks_for(count)
+
+            if len(used) < self.dim // 4:
+                # Sparse query: gather the used columns of each block and score them in one product
+                sparse = queries[:, used]
+                vectors = np.asarray(self.vectors)
+                scores = np.empty((len(queries), blocks, self.BLOCK_ROWS), dtype=np.float32)
+                for block in range(blocks):
+                    np.matmul(sparse, vectors[block].take(used, axis=0), out=scores[:, block])
+                scores = scores.reshape(len(queries), -1)[:, :count]
+            else:
+                chunks = []
+                for start in range(0, blocks, self.SCAN_BLOCKS):
+                    # (blocks, q, rows) -> (q, blocks * rows)
+                    chunk = np.matmul(queries, self.vectors[start:min(start + self.SCAN_BLOCKS, blocks)])
+                    chunks.append(chunk.transpose(1, 0, 2).reshape(len(queries), -1))
+                scores = np.concatenate(chunks, axis=1)[:, :count]
+
+            rows = np.argpartition(scores, count - k, axis=1)[:, count - k:]
+            top = np.take_along_axis(scores, rows, axis=1)
+            order = np.argsort(-top, axis=1)
+            rows = np.take_along_axis(rows, order, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            ids = self.ids[rows]
+
+        return [list(zip(id_row.tolist(), score_row.tolist())) for id_row, score_row in zip(ids, top)]
+
+class SemanticMemory:
+    """
+    Embedding index over completed conversation turns.
+
+    Each turn is embedded once, when its answer is recorded, and appended to
+    a VectorStore kept next to the database. Queries are embedded the same
+    way and scored against every stored turn in one pass. The text of the
+    most recently indexed or recalled turns is kept in memory, so recall
+    rarely needs the database.
+    """
+
+    TEXT_CACHE_TURNS = 1024
+
+    def __init__(self, base_path, embedder=None):
+        self.embedder = embedder or get_embedder()
+        self.store = VectorStore(base_path, self.embedder.dim, self.embedder.name)
+        self._lock = threading.Lock()
+        self._indexed = set(self.store.stored_ids().tolist())
+        self._texts = OrderedDict()
+
+    @staticmethod
+    def turn_text(user_msg, assistant_msg):
+        return f"{user_msg}\n{assistant_msg or ''}"
+
+    def add_turns(self, turns):
+        """
+        Index (id, user, assistant) turns not indexed yet
+
+        Returns:
+            int: Number of turns added
+        """
+        with self._lock:
+            turns = [turn for turn in turns if turn[0] not in self._indexed]
+            if not turns:
+                return 0
+            vectors = self.embedder.embed([self.turn_text(user, assistant) for _, user, assistant in turns])
+            self.store.append([turn[0] for turn in turns], vectors)
+            self._indexed.update(turn[0] for turn in turns)
+            self._remember(turns)
+        return len(turns)
+
+    def update_turn(self, turn):
+        """Re-embed an (id, user, assistant) turn whose answer changed, indexing it if new"""
+        with self._lock:
+            if turn[0] in self._indexed:
+                vector = self.embedder.embed([self.turn_text(turn[1], turn[2])])[0]
+                self.store.replace(turn[0], vector)
+                self._remember([turn])
+                return
+        self.add_turns([turn])
+
+    def _remember(self, turns):
+        """Keep turn text in the LRU; call with the lock held"""
+        for turn in turns:
+            self._texts[turn[0]] = tuple(turn)
+            self._texts.move_to_end(turn[0])
+        while len(self._texts) > self.TEXT_CACHE_TURNS:
+            self._texts.popitem(last=False)
+
+    def get_turns(self, ids, db):
+        """
+        (id, user, assistant) turns for the given ids, in the order given
+
+        Served from memory where possible; only missing turns are read from
+        the database, and kept for next time.
+        """
+        with self._lock:
+            missing = [turn_id for turn_id in ids if turn_id not in self._texts]
+        if missing:
+            fetched = db.get_turns_by_ids(missing)
+            with self._lock:
+                self._remember(fetched)
+        with self._lock:
+            turns = [self._texts[turn_id] for turn_id in ids if turn_id in self._texts]
+            for turn in turns:
+                self._texts.move_to_end(turn[0])
+        return turns
+
+    def backfill(self, db, batch_size=256):
+        """Index completed turns the store hasn't seen, oldest first"""
+        after_id = int(self.store.stored_ids().max()) if self.store.count else 0
+        added = 0
+        while True:
+            turns = db.get_turns_after(after_id, batch_size)
+            if not turns:
+                return added
+            added += self.add_turns(turns)
+            after_id = turns[-1][0]
+
+    def search(self, query, k=4, min_score=0.3, exclude_ids=()):
+        """
+        Ids of the past turns most similar to a query
+
+        Args:
+            query (str): Text to match
+            k (int): Most turns to return
+            min_score (float): Cosine similarity below which turns are ignored
+            exclude_ids (collection): Turn ids to leave out, e.g. ones already in the prompt
+
+        Returns:
+            list: (id, score) pairs, best first
+        """
+        excluded = set(exclude_ids)
+        results = self.store.search(self.embedder.embed([query]), k + len(excluded))[0]
+        return [(turn_id, score) for turn_id, score in results
+                if score >= min_score and turn_id not in excluded][:k]
@@ -0,0 +1,226 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from Backend.Intents import IntentRouter
+
+# Questions whose answer depends on the clock, the calendar or live data,
+# i.e. on what get_real_time_info puts in the prompt
+TIME_SENSITIVE = re.compile(
+    r"\b(?:time|date|day|days|today|tonight|tomorrow|yesterday|now|current|currently|latest|"
+    r"recent|news|weather|forecast|week|month|year|hour|hours|minute|minutes|clock|schedule|"
+    r"remind|reminder|timer|alarm|ago|until|since|live|score|price|stock)\b"
+)
+
+# Follow-ups whose meaning comes from the previous turn
+FOLLOW_UP = re.compile(
+    r"\b(?:it|that|this|those|these|them|he|she|they|him|his|her|their|again|more|else|"
+    r"another|same|above|previous|last|why|how come)\b"
+)
+
+# Words a lexical embedder ignores but that change what is being asked:
+# question words, auxiliaries, modals, pronouns and negations. Two questions
+# are only near-duplicates if they use the same ones
+FRAMING_WORDS = {
+    "what", "who", "whom", "whose", "which", "when", "where", "why", "how", "can", "could",
+    "would", "should", "will", "shall", "may", "might", "must", "do", "does", "did", "is",
+    "are", "was", "were", "am", "be", "been", "have", "has", "had", "i", "me", "my", "you",
+    "your", "we", "us", "our", "not", "no", "never", "don't", "can't", "won't", "isn't",
+}
+FILLER_WORDS = {"a", "an", "the", "of", "to", "in", "on", "at", "for", "with", "by", "and", "or", "so", "about"}
+
+class ResponseCache:
+    """
+    LRU cache of answers to repeated questions.
+
+    Entries are keyed by the normalized question plus a fingerprint of the
+    context the answer was produced in: model, instructions, the turns
+    recalled from memory and, for follow-ups, the previous turn. Lookups
+    try the exact key first, then, once an embedder is attached, the most
+    similar cached question with the same fingerprint. A similar question
+    only counts if both have enough content words and the same
+    FRAMING_WORDS, so "what can you do" never answers "what did you do".
+    Time-sensitive questions are never cached and entries expire after a TTL.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, similarity=0.92, embedder=None,
+                 min_content_words=2):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+            ttl_seconds (float): Age after which an entry is no longer served
+            similarity (float): Cosine similarity needed for a near-duplicate hit
+            embedder (optional): Object with embed(texts) returning unit vectors
+            min_content_words (int): Words besides framing and filler words a
+                question needs before it can match by similarity
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.embedder = embedder
+        self.min_content_words = min_content_words
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize(query):
+        text = IntentRouter.normalize(query)
+        return " ".join(re.sub(r"[^\w\s']", " ", text).split())
+
+    def framing(self, normalized):
+        """
+        Framing words of a normalized question, or None if it has too few
+        content words to be matched by similarity alone
+        """
+        words = normalized.split()
+        content = [word for word in words if word not in FRAMING_WORDS and word not in FILLER_WORDS]
+        if len(content) < self.min_content_words:
+            return None
+        return frozenset(word for word in words if word in FRAMING_WORDS)
+
+    def cacheable(self, query):
+        """False for questions whose answer changes with time"""
+        return not TIME_SENSITIVE.search(self.normalize(query))
+
+    def equivalent(self, query, other):
+        """Whether two questions would share a cache entry"""
+        normalized, other = self.normalize(query), self.normalize(other)
+        if normalized == other:
+            return True
+        embedder = self.embedder
+        framing = self.framing(normalized)
+        if embedder is None or framing is None or framing != self.framing(other):
+            return False
+        vectors = embedder.embed([normalized, other])
+        return float(vectors[0] @ vectors[1]) >= self.similarity
+
+    def fingerprint(self, query, context=(), recalled=(), previous_turn=None):
+        """
+        Hash of what, besides the question, the answer depends on
+
+        Args:
+            query (str): The user's question
+            context (list): Fixed inputs such as the model and system instructions
+            recalled (list): (id, user, assistant) turns recalled into the prompt
+            previous_turn (tuple, optional): Last turn, counted only for follow-ups
+
+        Returns:
+            str: Fingerprint to pass to get() and put()
+        """
+        parts = list(context)
+        # Earlier asks of the same question are recalled too; leaving them
+        # out keeps a repeat from changing its own fingerprint
+        parts.extend(turn[0] for turn in recalled if not self.equivalent(query, turn[1]))
+        if previous_turn and FOLLOW_UP.search(self.normalize(query)):
+            parts.append(repr(tuple(previous_turn)))
+        return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(normalized, fingerprint):
+        return hashlib.sha256(f"{fingerprint}|{normalized}".encode("utf-8")).hexdigest()
+
+    def _expired(self, entry, now):
+        return now - entry["created"] > self.ttl_seconds
+
+    def get(self, query, fingerprint):
+        """
+        Cached answer for a question, or None
+
+        Args:
+            query (str): The user's question
+            fingerprint (str): Context fingerprint from fingerprint()
+
+        Returns:
+            str: The cached answer, or None on a miss
+        """
+        if not self.cacheable(query):
+            with self._lock:
+                self.uncacheable += 1
+            return None
+
+        normalized = self.normalize(query)
+        key = self.make_key(normalized, fingerprint)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["answer"]
+            embedder = self.embedder
+
+        framing = self.framing(normalized)
+        if embedder is not None and framing is not None:
+            vector = embedder.embed([normalized])[0]
+            with self._lock:
+                best_key, best_score = None, self.similarity
+                for candidate_key, candidate in self._entries.items():
+                    if (candidate["fingerprint"] != fingerprint or candidate["vector"] is None
+                            or candidate["framing"] != framing or self._expired(candidate, now)):
+                        continue
+                    score = float(candidate["vector"] @ vector)
+                    if score >= best_score:
+                        best_key, best_score = candidate_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.similar_hits += 1
+                    return self._entries[best_key]["answer"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query, fingerprint, answer):
+        """Store an answer; time-sensitive questions are ignored"""
+        if not answer or not self.cacheable(query):
+            return
+        normalized = self.normalize(query)
+        embedder = self.embedder
+        vector = embedder.embed([normalized])[0] if embedder is not None else None
+        with self._lock:
+            key = self.make_key(normalized, fingerprint)
+            self._entries[key] = {
+                "answer": answer,
+                "fingerprint": fingerprint,
+                "vector": vector,
+                "framing": self.framing(normalized),
+                "created": time.monotonic(),
+            }
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters; hit_rate covers cacheable lookups only"""
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+            }
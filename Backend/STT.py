@@ -1,21 +1,446 @@
+import sys
+import time
+import wave
+import queue
+import threading
+from collections import deque
+import numpy as np
 import speech_recognition as sr
+from Backend.Tracing import get_tracer
 
-def recognize_speech(callback=None):
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+LANGUAGE = "en-IN"
 
-    with mic as source:
-        print("🎤 Listening...")
-        recognizer.adjust_for_ambient_noise(source)
-        audio = recognizer.listen(source)
+def frame_energy(frame):
+    """RMS energy of a frame of 16-bit mono samples"""
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
 
-    try:
-        text = recognizer.recognize_google(audio, language='en-IN')
+def to_int16_mono(data, sample_width, channels):
+    """Convert raw PCM of any common width and channel count to 16-bit mono samples"""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype="<i2")
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        samples = (raw[:, 1].astype(np.uint16) | (raw[:, 2].astype(np.uint16) << 8)).view(np.int16)
+    elif sample_width == 4:
+        samples = (np.frombuffer(data, dtype="<i4") >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported sample width {sample_width}")
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+        samples = samples.mean(axis=1).astype(np.int16)
+    return samples
+
+class WavSource:
+    """
+    Frames from a WAV file, read as if from a microphone.
+
+    Lets the engine, endpointing and calibration run without any audio
+    device. With realtime=True frames are paced at the speed they would
+    arrive from a live microphone.
+    """
+
+    sample_width = 2
+
+    def __init__(self, path, frame_ms=FRAME_MS, realtime=False):
+        with wave.open(path, "rb") as wav:
+            self.sample_rate = wav.getframerate()
+            self.samples = to_int16_mono(wav.readframes(wav.getnframes()), wav.getsampwidth(), wav.getnchannels())
+        self.frame_samples = self.sample_rate * frame_ms // 1000
+        self.frame_seconds = frame_ms / 1000
+        self.realtime = realtime
+        self.position = 0
+
+    def read(self):
+        """Next frame as bytes, or None at the end of the file"""
+        if self.position >= len(self.samples):
+            return None
+        frame = self.samples[self.position:self.position + self.frame_samples]
+        self.position += self.frame_samples
+        if len(frame) < self.frame_samples:
+            frame = np.concatenate([frame, np.zeros(self.frame_samples - len(frame), dtype=np.int16)])
+        if self.realtime:
+            time.sleep(self.frame_seconds)
+        return frame.tobytes()
+
+    def close(self):
+        pass
+
+class MicrophoneSource:
+    """The default microphone, opened once and read one frame at a time"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, device_index=None):
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate,
+                                        chunk_size=self.frame_samples)
+        self.source = self.microphone.__enter__()
+        self.sample_rate = self.source.SAMPLE_RATE
+        self.sample_width = self.source.SAMPLE_WIDTH
+
+    def read(self):
+        return self.source.stream.read(self.frame_samples)
+
+    def close(self):
+        self.microphone.__exit__(None, None, None)
+
+class EnergyVAD:
+    """
+    Voice activity by frame energy against a tracked noise floor.
+
+    calibrate() sets the floor once from a short stretch of audio. After
+    that every frame's energy is remembered, and recalibrate() moves the
+    floor to a low percentile of the recent ones: the pauses between
+    words expose the room noise even while someone is talking, so the
+    threshold follows the room, up or down, without pausing capture.
+
+    Another detector can stand in for it if it has the same four methods:
+    calibrate(energies), observe(energy), recalibrate() and is_speech(energy).
+    """
+
+    def __init__(self, ratio=3.0, min_energy=120.0, history_frames=300, noise_percentile=20):
+        """
+        Args:
+            ratio (float): How far above the noise floor speech must be
+            min_energy (float): Threshold floor, for very quiet rooms
+            history_frames (int): Recent frames considered when recalibrating
+            noise_percentile (float): Percentile of recent energy taken as the noise floor
+        """
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.noise_percentile = noise_percentile
+        self.noise_energy = 0.0
+        self._recent = deque(maxlen=history_frames)
+
+    @property
+    def threshold(self):
+        return max(self.min_energy, self.noise_energy * self.ratio)
+
+    def calibrate(self, energies):
+        energies = list(energies)
+        if energies:
+            self.noise_energy = float(np.percentile(energies, self.noise_percentile))
+
+    def observe(self, energy):
+        self._recent.append(energy)
+
+    def recalibrate(self):
+        """Move the noise floor to the recent audio, once enough of it has been heard"""
+        if len(self._recent) >= self._recent.maxlen // 4:
+            self.calibrate(self._recent)
+
+    def is_speech(self, energy):
+        return energy > self.threshold
+
+class Endpointer:
+    """
+    Cuts a continuous stream of frames into utterances.
+
+    While idle, the last pre_roll_ms of audio is kept in a ring buffer.
+    Speech starts after start_ms of consecutive voiced frames, and the
+    ring buffer is prepended so the first syllable isn't clipped. It ends
+    after end_silence_ms of silence, or at max_utterance_s. Bursts with
+    less than min_speech_ms of voiced audio are dropped as noise.
+    """
+
+    def __init__(self, vad, frame_ms=FRAME_MS, pre_roll_ms=300, start_ms=90, end_silence_ms=700,
+                 trailing_ms=200, min_speech_ms=200, max_utterance_s=15):
+        frames = lambda ms: max(1, int(round(ms / frame_ms)))
+        self.vad = vad
+        self.start_frames = frames(start_ms)
+        self.end_frames = frames(end_silence_ms)
+        self.trailing_frames = min(frames(trailing_ms), self.end_frames)
+        self.min_speech_frames = frames(min_speech_ms)
+        self.max_frames = frames(max_utterance_s * 1000)
+        self.pre_roll = deque(maxlen=frames(pre_roll_ms) + self.start_frames)
+        self.reset()
+
+    def reset(self):
+        self.utterance = None
+        self.speech_run = 0
+        self.silence_run = 0
+        self.voiced = 0
+
+    @property
+    def in_speech(self):
+        return self.utterance is not None
+
+    def feed(self, frame, energy):
+        """
+        Add one frame
+
+        Returns:
+            bytes: A finished utterance, or None
+        """
+        self.vad.observe(energy)
+        speech = self.vad.is_speech(energy)
+        if self.utterance is None:
+            self.pre_roll.append(frame)
+            if not speech:
+                self.speech_run = 0
+                return None
+            self.speech_run += 1
+            if self.speech_run >= self.start_frames:
+                self.utterance = list(self.pre_roll)
+                self.pre_roll.clear()
+                self.voiced = self.speech_run
+            return None
+
+        self.utterance.append(frame)
+        if speech:
+            self.voiced += 1
+            self.silence_run = 0
+        else:
+            self.silence_run += 1
+        if self.silence_run >= self.end_frames or len(self.utterance) >= self.max_frames:
+            return self.finish()
+        return None
+
+    def finish(self):
+        """End the current utterance, e.g. at the end of the stream"""
+        if self.utterance is None:
+            return None
+        utterance, voiced = self.utterance, self.voiced
+        # Keep a little of the closing silence; recognizers like a soft tail
+        cut = max(0, self.silence_run - self.trailing_frames)
+        self.reset()
+        if voiced < self.min_speech_frames:
+            return None
+        return b"".join(utterance[:len(utterance) - cut])
+
+def segment_stream(source, vad=None, calibration_ms=500, recalibrate_seconds=10, should_stop=None,
+                   **endpointing):
+    """
+    Split a frame source into utterances
+
+    Calibrates the VAD once from the first calibration_ms of audio, then
+    recalibrates from the recent audio every recalibrate_seconds.
+
+    Args:
+        source: WavSource, MicrophoneSource or anything with read() and sample_rate
+        vad (EnergyVAD, optional): Voice activity detector, or any object with
+            EnergyVAD's calibrate, observe, recalibrate and is_speech methods
+        should_stop (callable, optional): Checked after every frame
+        **endpointing: Options passed to Endpointer
+
+    Yields:
+        tuple: (start_seconds, end_seconds, pcm_bytes) per utterance
+    """
+    vad = vad or EnergyVAD()
+    frame_seconds = source.frame_samples / source.sample_rate
+    endpointer = Endpointer(vad, frame_ms=frame_seconds * 1000, **endpointing)
+    calibration_frames = max(1, int(calibration_ms / 1000 / frame_seconds))
+    recalibrate_frames = max(1, int(recalibrate_seconds / frame_seconds))
+
+    energies = []
+    position = 0
+    started = 0
+    since_calibration = 0
+    while not (should_stop and should_stop()):
+        frame = source.read()
+        if frame is None:
+            break
+        position += 1
+        energy = frame_energy(frame)
+        if len(energies) < calibration_frames:
+            energies.append(energy)
+            if len(energies) == calibration_frames:
+                vad.calibrate(energies)
+            continue
+
+        was_speech = endpointer.in_speech
+        audio = endpointer.feed(frame, energy)
+        if endpointer.in_speech and not was_speech:
+            # The utterance begins with the pre-roll, not with this frame
+            started = position - len(endpointer.utterance)
+        since_calibration += 1
+        if since_calibration >= recalibrate_frames:
+            vad.recalibrate()
+            since_calibration = 0
+        if audio:
+            yield started * frame_seconds, started * frame_seconds + len(audio) / 2 / source.sample_rate, audio
+
+    audio = endpointer.finish()
+    if audio:
+        yield started * frame_seconds, started * frame_seconds + len(audio) / 2 / source.sample_rate, audio
+
+class SpeechEngine:
+    """
+    Persistent listening service.
+
+    The audio source stays open and is read continuously on a capture
+    thread, so there is no per-utterance device setup or calibration
+    delay. Finished utterances are recognized on a second thread. Speech
+    is only transcribed while a caller is listening; otherwise frames
+    just keep the pre-roll buffer and noise floor current.
+    """
+
+    def __init__(self, source=None, vad=None, recognize=None, language=LANGUAGE, **segmenting):
+        """
+        Args:
+            source (optional): Frame source; defaults to the microphone, opened on start()
+            vad (EnergyVAD, optional): Voice activity detector, or any object with
+                EnergyVAD's calibrate, observe, recalibrate and is_speech methods
+            recognize (callable, optional): recognize(sr.AudioData) -> text, in place of Google
+            language (str): Recognition language
+            **segmenting: Options passed to segment_stream and Endpointer
+        """
+        self.source = source
+        # The default microphone is reopened after a device error; an
+        # injected source is the caller's to manage
+        self._owns_source = source is None
+        self.vad = vad or EnergyVAD()
+        self.language = language
+        self.recognizer = sr.Recognizer()
+        self._recognize = recognize or self.recognize_google
+        self.segmenting = segmenting
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+        self._utterances = queue.Queue(maxsize=8)
+        self.transcripts = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads and all(thread.is_alive() for thread in self._threads):
+                return
+            if self._threads:
+                # Capture ended (end of file or a device error): start over
+                for thread in self._threads:
+                    thread.join(timeout=2)
+                self._threads = []
+                self._utterances = queue.Queue(maxsize=8)
+                self.transcripts = queue.Queue()
+                if self._owns_source:
+                    self._close_source()
+            if self.source is None:
+                self.source = MicrophoneSource()
+            self._stopped.clear()
+            self._threads = [
+                threading.Thread(target=self._capture, name="falcon-stt-capture", daemon=True),
+                threading.Thread(target=self._transcribe_loop, name="falcon-stt-recognize", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self._close_source()
+
+    def _close_source(self):
+        if self.source is None:
+            return
+        try:
+            self.source.close()
+        except Exception as e:
+            print(f"Error closing audio source: {e}")
+        if self._owns_source:
+            self.source = None
+
+    def _capture(self):
+        try:
+            for start, end, audio in segment_stream(self.source, self.vad, should_stop=self._stopped.is_set,
+                                                    **self.segmenting):
+                if not self._listening.is_set():
+                    continue
+                data = sr.AudioData(audio, self.source.sample_rate, 2)
+                try:
+                    self._utterances.put_nowait(data)
+                except queue.Full:
+                    print("Speech recognition is falling behind; dropping an utterance")
+        except Exception as e:
+            print(f"Audio capture stopped: {e}")
+        finally:
+            # End of the source: let waiting listeners know
+            self._utterances.put(None)
+
+    def _transcribe_loop(self):
+        while True:
+            audio = self._utterances.get()
+            if audio is None:
+                self.transcripts.put(None)
+                return
+            text = self.transcribe(audio)
+            if text:
+                self.transcripts.put(text)
+
+    def recognize_google(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+    def transcribe(self, audio):
+        """Text for one utterance, or None if nothing intelligible was said"""
+        seconds = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        with get_tracer().span("stt.recognize", seconds=round(seconds, 2)):
+            try:
+                return self._recognize(audio)
+            except sr.UnknownValueError:
+                print("🤖 Could not understand audio.")
+            except sr.RequestError as e:
+                print(f"🔌 Could not request results; {e}")
+        return None
+
+    def listen(self, timeout=None):
+        """
+        Wait for the next thing said
+
+        Returns:
+            str: The transcript, or None on timeout or when the source ends
+        """
+        # Anything heard before this call is stale, but the end of the
+        # source is not: report it instead of waiting on dead threads
+        while not self.transcripts.empty():
+            if self.transcripts.get_nowait() is None:
+                return None
+        self._listening.set()
+        self.start()
+        try:
+            return self.transcripts.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            self._listening.clear()
+
+    def stream(self):
+        """Transcripts for as long as the source lasts, e.g. a whole WAV file"""
+        self._listening.set()
+        self.start()
+        try:
+            while True:
+                text = self.transcripts.get()
+                if text is None:
+                    return
+                yield text
+        finally:
+            self._listening.clear()
+
+_speech_engine = None
+_speech_engine_lock = threading.Lock()
+
+def get_speech_engine():
+    """Return the shared speech engine; the microphone opens on first listen"""
+    global _speech_engine
+    with _speech_engine_lock:
+        if _speech_engine is None:
+            _speech_engine = SpeechEngine()
+        return _speech_engine
+
+def recognize_speech(callback=None, timeout=None):
+    print("🎤 Listening...")
+    text = get_speech_engine().listen(timeout)
+    if text:
         print(f"🗣️  Mr. Rishi : {text}")
         if callback:
             callback(text)
-        return text
-    except sr.UnknownValueError:
-        print("🤖 Could not understand audio.")
-    except sr.RequestError as e:
-        print(f"🔌 Could not request results; {e}")
\ No newline at end of file
+    return text
+
+if __name__ == "__main__":
+    # python -m Backend.STT recording.wav  -> utterance boundaries, no microphone needed
+    for start, end, audio in segment_stream(WavSource(sys.argv[1])):
+        print(f"{start:7.2f}s - {end:7.2f}s  ({len(audio) // 2} samples)")
@@ -0,0 +1,433 @@
+import ast
+import hashlib
+import ntpath
+import re
+import shlex
+import threading
+from collections import OrderedDict, namedtuple
+
+Violation = namedtuple("Violation", ["line", "message"])
+
+# Modules generated automation code may import
+ALLOWED_MODULES = {
+    "os", "os.path", "sys", "time", "datetime", "random", "math", "json", "re", "string",
+    "webbrowser", "subprocess", "platform", "psutil", "pyautogui", "pyperclip", "pywhatkit",
+    "urllib", "urllib.parse", "collections", "tkinter", "tkinter.messagebox", "calendar",
+}
+
+# For these modules only the listed attributes may be used; other
+# allowed modules are unrestricted apart from DENIED_METHODS
+ALLOWED_ATTRIBUTES = {
+    "os": {
+        "path", "name", "sep", "linesep", "environ", "getenv", "getcwd", "listdir", "getpid",
+        "cpu_count", "startfile", "system", "popen", "makedirs", "mkdir", "getlogin",
+    },
+    "os.path": {
+        "join", "exists", "isfile", "isdir", "expanduser", "expandvars", "basename", "dirname",
+        "abspath", "normpath", "realpath", "splitext", "split", "getsize", "getmtime", "sep",
+    },
+    "sys": {"platform", "version", "version_info", "executable", "argv"},
+    "subprocess": {
+        "run", "Popen", "call", "check_call", "check_output", "DEVNULL", "PIPE", "STDOUT",
+        "CalledProcessError", "CREATE_NEW_CONSOLE", "CREATE_NO_WINDOW", "DETACHED_PROCESS",
+    },
+    "psutil": {
+        "process_iter", "Process", "pids", "pid_exists", "wait_procs", "cpu_percent", "cpu_count",
+        "cpu_freq", "virtual_memory", "swap_memory", "disk_usage", "disk_partitions", "boot_time",
+        "sensors_battery", "net_io_counters", "users", "NoSuchProcess", "AccessDenied",
+        "ZombieProcess", "TimeoutExpired",
+    },
+    "tkinter": {
+        "Tk", "Toplevel", "Frame", "Label", "Button", "Entry", "Text", "Canvas", "Listbox",
+        "Scrollbar", "Checkbutton", "Radiobutton", "Scale", "StringVar", "IntVar", "BooleanVar",
+        "messagebox", "END", "LEFT", "RIGHT", "TOP", "BOTTOM", "BOTH", "X", "Y", "N", "S", "E", "W",
+    },
+    "pywhatkit": {
+        "playonyt", "search", "info", "sendwhatmsg", "sendwhatmsg_instantly", "sendwhatmsg_to_group",
+        "sendwhatmsg_to_group_instantly", "text_to_handwriting",
+    },
+}
+
+# Modules that must not be reached through another module's attributes
+# (webbrowser.os, os.path.os) unless the dotted name is in ALLOWED_MODULES
+SHIELDED_MODULES = {
+    "os", "sys", "subprocess", "shutil", "ctypes", "importlib", "builtins", "pathlib", "io",
+    "socket", "pty", "signal", "tempfile", "glob", "pickle", "marshal", "runpy", "code",
+    "types", "inspect", "gc", "nt", "posix", "winreg", "msvcrt", "multiprocessing",
+    "urllib.request",
+}
+
+# Calls to these run a shell command; their arguments are checked
+COMMAND_CALLS = {
+    "os.system", "os.popen", "subprocess.run", "subprocess.Popen", "subprocess.call",
+    "subprocess.check_call", "subprocess.check_output", "webbrowser.BackgroundBrowser",
+    "webbrowser.GenericBrowser",
+}
+
+# webbrowser.get() treats anything but a browser name as a command line
+BROWSER_NAME = re.compile(r"^[\w.-]+$")
+
+# Calls that open their first argument the way a launcher does
+LAUNCH_CALLS = {"os.startfile"}
+
+# Builtins that defeat any static check
+DENIED_BUILTINS = {
+    "eval", "exec", "compile", "__import__", "input", "globals", "locals", "vars",
+    "getattr", "setattr", "delattr", "breakpoint", "memoryview",
+}
+
+# Builtins that may be called by name but never rebound or passed around,
+# so every call stays visible to the checks
+CALL_ONLY_BUILTINS = {"open"}
+
+# Destructive methods, refused whatever object they are called on. Names
+# shared with everyday types (list.remove, str.replace) are left to the
+# module allowlists instead
+DENIED_METHODS = {
+    "unlink", "rmdir", "removedirs", "rmtree", "rename", "renames", "truncate", "chmod",
+    "chown", "write_text", "write_bytes", "symlink_to", "hardlink_to", "fork", "forkpty",
+    "execv", "execve", "execl", "execlp", "execvp", "spawnv", "spawnl", "setuid", "setgid",
+    "putenv", "unsetenv", "eval", "exec", "tk",
+}
+
+# Modules the executor pre-loads into the snippet's globals
+PRELOADED = {"os": "os", "time": "time", "webbrowser": "webbrowser", "psutil": "psutil"}
+
+# Programs a command may start, by lower-case file name without ".exe"
+ALLOWED_COMMANDS = {
+    "taskkill", "tasklist", "pkill", "killall", "pgrep", "start", "explorer", "open",
+    "xdg-open", "notepad", "calc", "mspaint", "chrome", "google-chrome", "msedge", "firefox",
+    "brave", "opera", "spotify", "code", "discord", "telegram", "whatsapp", "slack", "zoom",
+    "teams", "vlc", "steam", "obs64", "winword", "excel", "powerpnt",
+}
+
+# Allowed commands that open another target; it must be a URL, a file that
+# is not executable or, by bare name or path, a program in ALLOWED_COMMANDS
+LAUNCHERS = {"start", "explorer", "open", "xdg-open"}
+
+EXECUTABLE_EXTENSIONS = (
+    ".exe", ".bat", ".cmd", ".com", ".ps1", ".vbs", ".vbe", ".js", ".jse", ".wsf", ".msi",
+    ".scr", ".lnk", ".sh", ".py", ".pyw", ".app", ".command", ".url", ".hta", ".cpl", ".pif",
+    ".jar", ".reg", ".inf", ".application",
+)
+
+# Windows-style switches such as /b or /max; anything else starting with /
+# is a path
+SWITCH = re.compile(r"^/\w+$")
+
+URL_PREFIXES = ("http://", "https://", "mailto:", "spotify:", "ms-settings:")
+
+# Characters that chain, redirect or expand inside a shell command
+SHELL_METACHARACTERS = set(";&|<>`$\n")
+
+class SafetyReport:
+    """Verdict for one snippet"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        self.safe = not violations
+
+    def __bool__(self):
+        return self.safe
+
+    def __str__(self):
+        if self.safe:
+            return "safe"
+        return "; ".join(f"line {v.line}: {v.message}" for v in self.violations)
+
+class _Visitor(ast.NodeVisitor):
+    """Single pass over a module's AST collecting violations"""
+
+    def __init__(self):
+        self.violations = []
+        # Local name -> module or dotted attribute it refers to
+        self.aliases = dict(PRELOADED)
+
+    def flag(self, node, message):
+        self.violations.append(Violation(getattr(node, "lineno", 0), message))
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            root = alias.name.split(".")[0]
+            if alias.name not in ALLOWED_MODULES:
+                self.flag(node, f"import of '{alias.name}' is not allowed")
+            elif not alias.asname and root not in ALLOWED_MODULES:
+                self.flag(node, f"import of '{alias.name}' binds '{root}', which is not allowed")
+            local = alias.asname or root
+            self.aliases[local] = alias.name if alias.asname else root
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ""
+        if node.level or module not in ALLOWED_MODULES:
+            self.flag(node, f"import from '{module}' is not allowed")
+            return
+        for alias in node.names:
+            if alias.name == "*":
+                self.flag(node, f"wildcard import from '{module}' is not allowed")
+                continue
+            self.check_step(node, module, alias.name)
+            self.aliases[alias.asname or alias.name] = f"{module}.{alias.name}"
+
+    def check_step(self, node, module, attribute):
+        """Check one attribute taken directly on a module"""
+        dotted = f"{module}.{attribute}"
+        allowed = ALLOWED_ATTRIBUTES.get(module)
+        if allowed is not None and attribute not in allowed:
+            self.flag(node, f"'{dotted}' is not allowed")
+        elif attribute in DENIED_METHODS:
+            self.flag(node, f"'{dotted}' is not allowed")
+        elif attribute.startswith("_"):
+            self.flag(node, f"private attribute '{dotted}' is not allowed")
+        elif (attribute in SHIELDED_MODULES or dotted in SHIELDED_MODULES) and dotted not in ALLOWED_MODULES:
+            self.flag(node, f"'{dotted}' reaches a module that is not allowed")
+
+    def check_reference(self, node, name, called):
+        """
+        Check a bare name. Modules, command functions and call-only builtins
+        must not be rebound or passed around, since the checks only see
+        them by name
+        """
+        if name == "__builtins__":
+            self.flag(node, "access to '__builtins__' is not allowed")
+        elif name in self.aliases:
+            self.check_value(node, self.aliases[name], called)
+        elif name in DENIED_BUILTINS:
+            self.flag(node, f"call to '{name}()' is not allowed" if called
+                      else f"reference to '{name}' is not allowed")
+        elif name in CALL_ONLY_BUILTINS and not called:
+            self.flag(node, f"'{name}' may only be called directly")
+
+    def check_value(self, node, qualified, called):
+        if qualified in ALLOWED_MODULES:
+            self.flag(node, f"module '{qualified}' may only be used through its attributes")
+        elif qualified in COMMAND_CALLS and not called:
+            self.flag(node, f"'{qualified}' may only be called directly")
+
+    def check_chain(self, node, called):
+        """
+        Check a whole attribute chain. Every step is checked for dunders and
+        destructive methods; chains rooted at an import are resolved step
+        by step against the module allowlists
+
+        Returns:
+            str | None: Dotted name of the chain if it is rooted at an import
+        """
+        attributes = []
+        base = node
+        while isinstance(base, ast.Attribute):
+            attributes.append(base.attr)
+            base = base.value
+        attributes.reverse()
+
+        for attribute in attributes:
+            if attribute.startswith("__") and attribute.endswith("__"):
+                self.flag(node, f"access to '{attribute}' is not allowed")
+            elif attribute in DENIED_METHODS:
+                self.flag(node, f"use of '.{attribute}' is not allowed")
+
+        if not isinstance(base, ast.Name):
+            self.visit(base)
+            return None
+        if base.id not in self.aliases:
+            self.check_reference(base, base.id, called=False)
+            return None
+
+        current = self.aliases[base.id]
+        for attribute in attributes:
+            if current in ALLOWED_MODULES:
+                self.check_step(node, current, attribute)
+            current = f"{current}.{attribute}"
+
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.flag(node, f"assigning to '{current}' is not allowed")
+        else:
+            self.check_value(node, current, called)
+        return current
+
+    def visit_Attribute(self, node):
+        self.check_chain(node, called=False)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.check_reference(node, node.id, called=False)
+
+    def visit_Call(self, node):
+        func = node.func
+        name = None
+        if isinstance(func, ast.Name):
+            self.check_reference(node, func.id, called=True)
+            name = self.aliases.get(func.id, func.id)
+        elif isinstance(func, ast.Attribute):
+            name = self.check_chain(func, called=True)
+        else:
+            self.visit(func)
+
+        if name == "open":
+            self.check_open(node)
+        elif name in COMMAND_CALLS:
+            self.check_command(node, name)
+        elif name in LAUNCH_CALLS:
+            self.check_launch(node, name)
+        elif name == "webbrowser.get" and node.args:
+            browser = self.literal_string(node.args[0])
+            if browser is None or not BROWSER_NAME.match(browser):
+                self.check_command(node, name)
+
+        for argument in node.args:
+            self.visit(argument)
+        for keyword in node.keywords:
+            self.visit(keyword.value)
+
+    def check_open(self, node):
+        mode = node.args[1] if len(node.args) > 1 else None
+        for keyword in node.keywords:
+            if keyword.arg == "mode":
+                mode = keyword.value
+        if mode is None:
+            return
+        if not (isinstance(mode, ast.Constant) and isinstance(mode.value, str)):
+            self.flag(node, "open() with a computed mode is not allowed")
+        elif set(mode.value) & set("wax+"):
+            self.flag(node, f"open() in write mode '{mode.value}' is not allowed")
+
+    def check_command(self, node, name):
+        """Commands must start an allowed program; see ALLOWED_COMMANDS"""
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+        argument = node.args[0] if node.args else keywords.get("args")
+        if argument is None:
+            return
+        if "executable" in keywords:
+            self.flag(node, f"'{name}' with executable= is not allowed")
+            return
+
+        shell = keywords.get("shell")
+        through_shell = name in ("os.system", "os.popen") or not (
+            shell is None or (isinstance(shell, ast.Constant) and not shell.value))
+
+        if isinstance(argument, (ast.List, ast.Tuple)) and not through_shell:
+            self.check_argv(node, argument.elts)
+            return
+
+        text = self.literal_string(argument)
+        if text is None:
+            self.flag(node, "shell command built at runtime is not allowed")
+            return
+        if set(text) & SHELL_METACHARACTERS:
+            self.flag(node, "shell command with chaining or redirection is not allowed")
+            return
+        try:
+            tokens = [token.strip("'\"") for token in shlex.split(text, posix=False)]
+        except ValueError:
+            self.flag(node, "shell command with unbalanced quotes is not allowed")
+            return
+        self.check_program(node, tokens)
+
+    def check_argv(self, node, elements):
+        """Argument lists run without a shell; only the program and a launcher's target must be literal"""
+        tokens = []
+        for element in elements:
+            text = self.literal_string(element)
+            if text is None:
+                # Computed arguments are fine once the program is known
+                # and is not a launcher
+                if not tokens or tokens[0] in LAUNCHERS:
+                    self.flag(node, "command built at runtime is not allowed")
+                    return
+                text = ""
+            tokens.append(text if tokens else self.program_name(text))
+        self.check_program(node, tokens)
+
+    def check_program(self, node, tokens):
+        if not tokens:
+            return
+        program = self.program_name(tokens[0])
+        if program not in ALLOWED_COMMANDS:
+            self.flag(node, f"running '{program}' is not allowed")
+            return
+        if program in LAUNCHERS:
+            for target in tokens[1:]:
+                if not target or target.startswith("-") or SWITCH.match(target):
+                    continue
+                if not self.launchable(target):
+                    self.flag(node, f"'{program}' may not open '{target}'")
+                    return
+
+    def check_launch(self, node, name):
+        target = self.literal_string(node.args[0]) if node.args else None
+        if target is None:
+            self.flag(node, f"'{name}' with a computed target is not allowed")
+        elif not self.launchable(target):
+            self.flag(node, f"'{name}' may not open '{target}'")
+
+    def launchable(self, target):
+        """URLs, files that are not executable and allowed programs"""
+        lowered = target.lower()
+        if lowered.startswith(URL_PREFIXES):
+            return True
+        extension = ntpath.splitext(ntpath.basename(lowered))[1]
+        if extension and extension not in EXECUTABLE_EXTENSIONS:
+            return True
+        return self.program_name(target) in ALLOWED_COMMANDS
+
+    @staticmethod
+    def program_name(token):
+        name = ntpath.basename(token).lower()
+        return name[:-4] if name.endswith(".exe") else name
+
+    @staticmethod
+    def literal_string(argument):
+        """Text of a literal string argument, or None if it is computed"""
+        if isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+            return argument.value
+        if isinstance(argument, ast.JoinedStr) and all(
+                isinstance(part, ast.Constant) for part in argument.values):
+            return "".join(part.value for part in argument.values)
+        return None
+
+class SafetyAnalyzer:
+    """
+    Allowlist-based static safety check for generated Python code.
+
+    Parses the snippet once and walks the tree in a single pass, checking
+    imports against ALLOWED_MODULES, every step of attribute chains against
+    ALLOWED_ATTRIBUTES, calls against the builtin and method denylists, and
+    literal commands against ALLOWED_COMMANDS. Modules and command functions
+    may not be rebound to other names. Verdicts are memoized by code hash.
+    """
+
+    def __init__(self, cache_size=1024):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, code):
+        """
+        Check a snippet
+
+        Args:
+            code (str): Python source
+
+        Returns:
+            SafetyReport: Verdict with the violations found, by line
+        """
+        key = hashlib.sha256(code.encode("utf-8")).digest()
+        with self._lock:
+            report = self._cache.get(key)
+            if report is not None:
+                self._cache.move_to_end(key)
+                return report
+
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            report = SafetyReport([Violation(e.lineno or 0, f"syntax error: {e.msg}")])
+        else:
+            visitor = _Visitor()
+            visitor.visit(tree)
+            report = SafetyReport(visitor.violations)
+
+        with self._lock:
+            self._cache[key] = report
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return report
@@ -0,0 +1,291 @@
+import os
+import io
+import sys
+import json
+import time
+import queue
+import threading
+import traceback
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+
+# Imported once per worker so snippets don't pay for them on every run
+WARM_MODULES = ("time", "webbrowser", "subprocess", "datetime", "random", "psutil", "pyautogui", "pyperclip")
+
+# Exit status of a worker that stops a snippet for using too much CPU time
+CPU_LIMIT_EXIT = 152
+
+# Seconds between the worker's CPU-time checks and idle child reaping
+POLL_INTERVAL = 0.1
+
+class SandboxWorker:
+    """
+    One pre-started Python process that executes snippets on request.
+
+    Requests and results travel as JSON lines over the process's stdin and
+    a private copy of its stdout. A reader thread collects results so the
+    caller can wait with a wall-clock timeout.
+    """
+
+    def __init__(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "Backend.Sandbox"],
+            cwd=root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self.results = queue.Queue()
+        self.ready = False
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            try:
+                self.results.put(json.loads(line))
+            except ValueError:
+                continue
+        # EOF: the worker exited or was killed
+        self.results.put(None)
+
+    def wait_ready(self, timeout):
+        if self.ready:
+            return True
+        try:
+            message = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        self.ready = bool(message and message.get("ready"))
+        return self.ready
+
+    def run(self, code, wall_timeout, cpu_seconds):
+        """
+        Execute code in the worker
+
+        Returns:
+            dict: ok, stdout, stderr, error, exit_status and duration
+        """
+        started = time.monotonic()
+        if not self.alive():
+            return self._failure("Sandbox worker is not running", 1, started)
+        if not self.wait_ready(wall_timeout):
+            return self._failure("Sandbox worker did not start", 124, started)
+
+        try:
+            self.process.stdin.write(json.dumps({"code": code, "cpu_seconds": cpu_seconds}) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            return self._failure(f"Sandbox worker unavailable: {e}", 1, started)
+
+        remaining = max(0.0, wall_timeout - (time.monotonic() - started))
+        try:
+            result = self.results.get(timeout=remaining)
+        except queue.Empty:
+            self.kill()
+            return self._failure(f"Timed out after {wall_timeout} seconds", 124, started)
+
+        if result is None:
+            code = self.process.wait()
+            reason = "CPU time limit exceeded" if code == CPU_LIMIT_EXIT else f"Sandbox worker crashed (exit {code})"
+            return self._failure(reason, code or 1, started)
+        return result
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _failure(error, exit_status, started):
+        return {
+            "ok": False,
+            "stdout": "",
+            "stderr": "",
+            "error": error,
+            "exit_status": exit_status,
+            "duration": time.monotonic() - started
+        }
+
+class SandboxPool:
+    """
+    Pool of pre-warmed worker processes for generated automation code.
+
+    Snippets run outside the assistant's process with a wall-clock timeout
+    and a CPU-time limit. A worker that
+    hangs, crashes or exceeds a limit is discarded and replaced, so a bad
+    snippet can't freeze or take down the assistant.
+    """
+
+    def __init__(self, size=2, wall_timeout=30, cpu_seconds=20):
+        self.size = size
+        self.wall_timeout = wall_timeout
+        self.cpu_seconds = cpu_seconds
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(SandboxWorker())
+
+    def execute(self, code, wall_timeout=None, cpu_seconds=None):
+        """
+        Run a snippet on the next free worker
+
+        Args:
+            code (str): Python code to execute
+            wall_timeout (float, optional): Seconds before the worker is killed
+            cpu_seconds (int, optional): CPU seconds the snippet may use
+
+        Returns:
+            dict: ok, stdout, stderr, error, exit_status and duration
+        """
+        worker = self.idle.get()
+        try:
+            result = worker.run(code, wall_timeout or self.wall_timeout, cpu_seconds or self.cpu_seconds)
+        finally:
+            if not worker.alive():
+                worker.kill()
+                try:
+                    worker = SandboxWorker()
+                except Exception:
+                    # Keep the dead worker in its slot; it fails fast and
+                    # the replacement is retried after its next use
+                    pass
+            self.idle.put(worker)
+        return result
+
+    def shutdown(self):
+        for _ in range(self.size):
+            self.idle.get().kill()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_sandbox_pool():
+    """Return the shared sandbox pool, starting its workers on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+        return _pool
+
+class _CpuWatchdog:
+    """
+    Stops the worker when the running snippet uses more than its CPU time.
+
+    The limit is measured from this process's own CPU time, so programs a
+    snippet launches (a browser, a music player) are not counted and are
+    not limited. An RLIMIT_CPU on the worker would be inherited by them.
+    """
+
+    def __init__(self):
+        self.limit = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def start(self, cpu_seconds):
+        with self.lock:
+            self.limit = time.process_time() + cpu_seconds
+
+    def stop(self):
+        with self.lock:
+            self.limit = None
+
+    def _watch(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self.lock:
+                if self.limit is not None and time.process_time() > self.limit:
+                    os._exit(CPU_LIMIT_EXIT)
+
+def _reap_children():
+    """Collect exited processes that snippets launched and left behind"""
+    if not hasattr(os, "WNOHANG"):
+        return  # Windows has no zombies to collect
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        pass
+
+def _reap_while_idle(busy):
+    # Reaping during a snippet could take the exit status its own
+    # subprocess calls are waiting for, so only reap between snippets
+    while True:
+        time.sleep(POLL_INTERVAL * 10)
+        if busy.acquire(blocking=False):
+            try:
+                _reap_children()
+            finally:
+                busy.release()
+
+def _execute(code):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exec_globals = {
+        "__builtins__": __builtins__,
+        "__name__": "__main__",
+        "os": os,
+        "time": sys.modules.get("time"),
+        "webbrowser": sys.modules.get("webbrowser"),
+        "psutil": sys.modules.get("psutil")
+    }
+    started = time.monotonic()
+    ok, error, exit_status = True, None, 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(code, exec_globals)
+        except SystemExit as e:
+            exit_status = e.code if isinstance(e.code, int) else 0
+            ok = exit_status == 0
+            error = None if ok else f"SystemExit: {e.code}"
+        except BaseException as e:
+            ok, error, exit_status = False, f"{type(e).__name__}: {e}", 1
+            traceback.print_exc()
+    return {
+        "ok": ok,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "error": error,
+        "exit_status": exit_status,
+        "duration": time.monotonic() - started
+    }
+
+def _worker_main():
+    # Keep a private channel to the parent and point fd 1 elsewhere, so
+    # snippets writing straight to the file descriptor can't corrupt it
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for module in WARM_MODULES:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+    watchdog = _CpuWatchdog()
+    busy = threading.Lock()
+    threading.Thread(target=_reap_while_idle, args=(busy,), daemon=True).start()
+    channel.write(json.dumps({"ready": True}) + "\n")
+
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        with busy:
+            watchdog.start(request.get("cpu_seconds", 20))
+            try:
+                result = _execute(request.get("code", ""))
+            finally:
+                watchdog.stop()
+            _reap_children()
+        channel.write(json.dumps(result) + "\n")
+
+if __name__ == "__main__":
+    _worker_main()
@@ -1,13 +1,17 @@
 import pygame
-import random
 import asyncio
 import edge_tts
+import io
+import hashlib
+import queue
+import threading
 import os
 import re
 import unicodedata
-import tempfile
+from collections import OrderedDict
 import time
 from dotenv import load_dotenv
+from Backend.Tracing import get_tracer
 
 load_dotenv()
 
@@ -40,52 +44,266 @@ def clean_text(text):
     
     return cleaned_text
 
+VOICE = "en-CA-LiamNeural"
+PITCH = "+0Hz"
+RATE = "+0%"
+
+# Sentences shorter than this are merged with the next one so we don't
+# pay a synthesis round trip for fragments like "Sure!"
+MIN_SENTENCE_CHARS = 40
+
+def split_sentences(text):
+    """
+    Splits cleaned text into sentence-sized chunks for pipelined synthesis.
+
+    Args:
+        text (str): Cleaned text
+    Returns:
+        list: Sentences, short ones merged with their neighbour
+    """
+    sentences = []
+    pending = ""
+    for sentence in re.split(r'(?<=[.!?;:])\s+', text.strip()):
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < MIN_SENTENCE_CHARS:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized speech.
+
+    Entries are keyed by a hash of (text, voice, pitch, rate) and kept both
+    in memory and as MP3 files under Database/TTSCache, each tier bounded in
+    bytes with least-recently-used eviction. The directory is scanned once
+    at start-up; after that the index is kept in memory.
+    """
+
+    def __init__(self, cache_dir="Database/TTSCache", max_disk_bytes=64 * 1024 * 1024,
+                 max_memory_bytes=8 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.synthesis_seconds = 0.0
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice=VOICE, pitch=PITCH, rate=RATE):
+        return hashlib.sha256(f"{voice}|{pitch}|{rate}|{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _load_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        # Oldest first, so the front of the dict is the next to evict
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, key):
+        """Cached audio for key, or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            on_disk = key in self._disk
+
+        if on_disk:
+            path = self.path_for(key)
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                # mtime doubles as the LRU clock across restarts
+                os.utime(path)
+            except OSError:
+                with self._lock:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+            else:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self.disk_hits += 1
+                    self._remember(key, audio)
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, audio, synthesis_seconds=0.0):
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"TTS cache write failed: {e}")
+            path = None
+
+        with self._lock:
+            self.synthesis_seconds += synthesis_seconds
+            self._remember(key, audio)
+            if path and key not in self._disk:
+                self._disk[key] = len(audio)
+                self._disk_bytes += len(audio)
+                self._evict_disk()
+
+    def _remember(self, key, audio):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Hit/miss counters and the synthesis time saved by hits"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            avg_synthesis = self.synthesis_seconds / self.misses if self.misses else 0.0
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "avg_synthesis_seconds": avg_synthesis,
+                "estimated_seconds_saved": hits * avg_synthesis,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache():
+    """Return the shared audio cache, loading its index on first use"""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
+
+async def synthesize_to_memory(text):
+    """
+    Synthesizes text with edge-tts, collecting the streamed MP3 chunks in memory.
+    Repeated phrases are served from the audio cache.
+
+    Args:
+        text (str): Text to convert to speech
+    Returns:
+        bytes: MP3 audio
+    """
+    with get_tracer().span("tts.synthesize", characters=len(text)) as span:
+        cache = get_audio_cache()
+        key = cache.make_key(text)
+        audio = cache.get(key)
+        span.set(cached=audio is not None)
+        if audio is not None:
+            return audio
+
+        started = time.perf_counter()
+        communicate = edge_tts.Communicate(text, VOICE, pitch=PITCH, rate=RATE)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        audio = bytes(audio)
+
+        if audio:
+            cache.put(key, audio, time.perf_counter() - started)
+        return audio
+
 async def text_to_audio_file(text):
     """
     Converts text to speech audio file using edge-tts.
-    Uses unique filenames to avoid file conflicts.
+    The file lives in the audio cache, named by its content key.
     
     Args:
         text (str): Text to convert to speech
+    Returns:
+        str: Path to the MP3 file
     """
-    # Use timestamp to create unique filename
-    timestamp = int(time.time() * 1000)
-    file_path = f"Database/TTS_{timestamp}.mp3"
-    
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    cache = get_audio_cache()
+    await synthesize_to_memory(text)
+    return cache.path_for(cache.make_key(text))
 
-    # Get voice from environment or use default
-    voice = "en-CA-LiamNeural"
-    
-    # Convert text to speech
-    communicate = edge_tts.Communicate(text, voice, pitch='+0Hz', rate='+0%')
-    await communicate.save(file_path)
-    
-    return file_path
+async def speak_sentences(sentences, callback_func):
+    """
+    Plays sentences back to back, synthesizing the next one while the
+    current one is playing.
 
-def cleanup_old_tts_files():
-    """Clean up old TTS files to prevent disk space issues."""
+    Args:
+        sentences (list): Sentences to speak, in order
+        callback_func: Called during playback; returning False stops it
+    """
+    started = time.perf_counter()
+    next_audio = asyncio.create_task(synthesize_to_memory(sentences[0]))
     try:
-        database_dir = "Database"
-        if os.path.exists(database_dir):
-            for filename in os.listdir(database_dir):
-                if filename.startswith("TTS_") and filename.endswith(".mp3"):
-                    file_path = os.path.join(database_dir, filename)
-                    try:
-                        # Only delete files older than 5 minutes
-                        if time.time() - os.path.getctime(file_path) > 300:
-                            os.remove(file_path)
-                    except (OSError, FileNotFoundError):
-                        # File might be in use or already deleted
-                        pass
-    except Exception:
-        # Ignore cleanup errors
-        pass
+        for index in range(len(sentences)):
+            audio = await next_audio
+            if callback_func() is False:
+                return
+            if index + 1 < len(sentences):
+                next_audio = asyncio.create_task(synthesize_to_memory(sentences[index + 1]))
+
+            pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+            pygame.mixer.music.play()
+            if index == 0:
+                get_tracer().record("tts.playback_start", (time.perf_counter() - started) * 1000)
+
+            # Sleeping in the event loop lets the next synthesis make progress
+            while pygame.mixer.music.get_busy():
+                if callback_func() is False:
+                    return
+                await asyncio.sleep(0.05)
+    finally:
+        if not next_audio.done():
+            next_audio.cancel()
 
 def text_to_speech(text, callback_func=None):
     """
     Plays text as speech using pygame.
+
+    The text is spoken sentence by sentence so playback starts as soon as
+    the first sentence is synthesized.
     
     Args:
         text (str): Text to speak
@@ -94,28 +312,18 @@ def text_to_speech(text, callback_func=None):
     """
     if callback_func is None:
         callback_func = lambda r=None: True
-        
-    audio_file = None
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return
+
     try:
         # Initialize pygame mixer if not already initialized
         if not pygame.mixer.get_init():
             pygame.mixer.init()
 
-        # Clean up old files first
-        cleanup_old_tts_files()
-
-        # Generate the audio file
-        audio_file = asyncio.run(text_to_audio_file(text))
-
-        # Play the audio
-        pygame.mixer.music.load(audio_file)
-        pygame.mixer.music.play()
-
-        # Wait while audio is playing
-        while pygame.mixer.music.get_busy():
-            if callback_func() is False:
-                break
-            pygame.time.Clock().tick(10)
+        with get_tracer().span("tts.speak", sentences=len(sentences)):
+            asyncio.run(speak_sentences(sentences, callback_func))
 
     except Exception as e:
         print(f"Text-to-speech error: {e}")
@@ -125,48 +333,156 @@ def text_to_speech(text, callback_func=None):
         callback_func(False)
         if pygame.mixer.get_init():
             pygame.mixer.music.stop()
-            # Unload the music to release the file
             pygame.mixer.music.unload()
-        
-        # Try to clean up the audio file after a short delay
-        if audio_file and os.path.exists(audio_file):
-            try:
-                # Small delay to ensure file is released
-                time.sleep(0.1)
-                os.remove(audio_file)
-            except (OSError, FileNotFoundError):
-                # File might still be in use, will be cleaned up later
-                pass
             
-def SpeakFalcon(text, callback_func=None):
+class SpeechWorker:
     """
-    Smart text-to-speech function that handles long text appropriately.
-    
-    For long text, speaks only the beginning and notifies that the rest
+    Dedicated speech thread with a persistent event loop and mixer.
+
+    Utterances are queued and spoken one at a time without tying up the
+    caller. stop() cancels the current utterance and drops anything queued,
+    so a new request can barge in immediately. Only the worker thread
+    touches the mixer.
+    """
+
+    def __init__(self, max_queue=8):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._init_error = None
+        self.thread = threading.Thread(target=self._run, name="falcon-speech", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._init_error:
+            raise RuntimeError(f"could not open audio device: {self._init_error}")
+
+    def speak(self, text):
+        """Queue text for speaking, dropping the oldest utterance if the queue is full"""
+        with self._lock:
+            item = (self.generation, text, time.perf_counter())
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.queue.put_nowait(item)
+
+    def stop(self):
+        """
+        Stop the current utterance and discard queued ones
+
+        Playback notices the new generation within one poll and stops the
+        mixer itself, on the worker thread.
+        """
+        with self._lock:
+            self.generation += 1
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            pygame.mixer.init()
+        except Exception as e:
+            self._init_error = e
+            return
+        finally:
+            self._ready.set()
+
+        while True:
+            generation, text, queued_at = self.queue.get()
+            if generation != self.generation:
+                continue
+
+            sentences = split_sentences(text)
+            if not sentences:
+                continue
+
+            try:
+                with get_tracer().span("tts.speak", sentences=len(sentences),
+                                       queued_ms=(time.perf_counter() - queued_at) * 1000):
+                    loop.run_until_complete(speak_sentences(
+                        sentences, lambda r=None: self.generation == generation
+                    ))
+            except Exception as e:
+                print(f"Text-to-speech error: {e}")
+            finally:
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+
+_speech_worker = None
+_speech_worker_lock = threading.Lock()
+
+def get_speech_worker():
+    """
+    Return the shared speech worker, starting it on first use
+
+    Raises:
+        RuntimeError: The audio device can't be opened; the next call tries again
+    """
+    global _speech_worker
+    with _speech_worker_lock:
+        if _speech_worker is None:
+            _speech_worker = SpeechWorker()
+        return _speech_worker
+
+def prepare_speech_text(text):
+    """
+    Cleans text for speech and trims long text to its opening.
+
+    For long text, keeps only the first couple of sentences since the rest
     is available on screen.
-    
+
     Args:
         text (str): Text to speak
-        callback_func: Optional callback function
+    Returns:
+        str: Speech-ready text
     """
-    if callback_func is None:
-        callback_func = lambda r=None: True
-        
-    # Clean the input text
     cleaned_text = clean_text(text)
-    
+
     # For long text, speak only the beginning
     if len(cleaned_text) >= 1000:
         # Split by sentences
         sentences = re.split(r'(?<=[.!?])\s+', cleaned_text)
-        
+
         # Speak first couple of sentences
         if len(sentences) > 2:
-            shortened_text = ' '.join(sentences[:2])
-            text_to_speech(shortened_text, callback_func)
-        else:
-            # If we don't have enough sentences, just speak what we have
-            text_to_speech(cleaned_text, callback_func)
-    else:
-        # For shorter text, speak it all
-        text_to_speech(cleaned_text, callback_func)
+            return ' '.join(sentences[:2])
+
+    return cleaned_text
+
+def SpeakFalcon(text, callback_func=None, block=True):
+    """
+    Smart text-to-speech function that handles long text appropriately.
+    
+    For long text, speaks only the beginning and notifies that the rest
+    is available on screen.
+    
+    Args:
+        text (str): Text to speak
+        callback_func: Optional callback function
+        block (bool): If False, queue the text on the speech worker and return
+    """
+    speech_text = prepare_speech_text(text)
+
+    if not block:
+        get_speech_worker().speak(speech_text)
+        return
+
+    text_to_speech(speech_text, callback_func)
+
+def StopSpeaking():
+    """Stop any speech in progress and clear queued utterances."""
+    if _speech_worker is not None:
+        _speech_worker.stop()
+
+def GetSpeechCacheStats():
+    """Hit/miss counters for the TTS audio cache."""
+    return get_audio_cache().stats()
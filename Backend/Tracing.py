@@ -0,0 +1,241 @@
+import os
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# (trace_id, span_id) of the span open in the current thread or task;
+# asyncio tasks and asyncio.to_thread carry it along automatically
+_current_span = contextvars.ContextVar("falcon_current_span", default=None)
+
+def percentile(sorted_values, q):
+    """Linearly interpolated q-th percentile (0-100) of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(spans):
+    """
+    Per-stage latency summary
+
+    Args:
+        spans (iterable): Span dicts with at least 'name', 'duration_ms' and 'status'
+
+    Returns:
+        dict: Stage name -> count, errors, mean, p50, p95, p99 and max in milliseconds
+    """
+    durations = {}
+    errors = {}
+    for span in spans:
+        durations.setdefault(span["name"], []).append(span["duration_ms"])
+        if span.get("status") == "error":
+            errors[span["name"]] = errors.get(span["name"], 0) + 1
+
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1],
+        }
+    return summary
+
+class Span:
+    """One timed stage; attributes can be added while it is open"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "started_at", "_started")
+
+    def __init__(self, trace_id, parent_id, name, attrs):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed_ms(self):
+        """Milliseconds since the span opened, e.g. for time-to-first-token"""
+        return (time.perf_counter() - self._started) * 1000
+
+class Tracer:
+    """
+    In-process span recorder for the assistant pipeline.
+
+    Finished spans go into a fixed-size ring buffer, so tracing costs a few
+    microseconds per stage and bounded memory. Spans opened inside another
+    span share its trace id, which ties a turn's database calls, LLM calls,
+    tools and speech together. With persist_to(), spans are also handed in
+    batches to a sink (the database) from a background thread.
+    """
+
+    def __init__(self, capacity=4096):
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._sink = None
+        self._flush_interval = 2.0
+        self._writer = None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time the enclosed block as one stage
+
+        Args:
+            name (str): Stage name, e.g. 'llm.first' or 'tool.generate_image'
+            **attrs: Extra attributes stored with the span
+
+        Yields:
+            Span: The open span, for adding attributes
+        """
+        parent = _current_span.get()
+        trace_id = parent[0] if parent else uuid.uuid4().hex[:16]
+        span = Span(trace_id, parent[1] if parent else None, name, attrs)
+        token = _current_span.set((trace_id, span.span_id))
+        status = "ok"
+        try:
+            yield span
+        except BaseException as e:
+            status = "error"
+            span.attrs.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span, span.elapsed_ms(), status)
+
+    def record(self, name, duration_ms, status="ok", **attrs):
+        """Store a stage measured elsewhere, e.g. the wait before playback starts"""
+        parent = _current_span.get()
+        span = Span(parent[0] if parent else uuid.uuid4().hex[:16], parent[1] if parent else None, name, attrs)
+        span.started_at -= duration_ms / 1000
+        self._finish(span, duration_ms, status)
+
+    def bind(self, coroutine):
+        """
+        Wrap a coroutine so it runs inside the caller's current span
+
+        Needed when a coroutine is handed to another thread's event loop,
+        which would otherwise start it with an empty context.
+        """
+        parent = _current_span.get()
+
+        async def run():
+            _current_span.set(parent)
+            return await coroutine
+        return run()
+
+    def _finish(self, span, duration_ms, status):
+        row = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "started_at": span.started_at,
+            "duration_ms": duration_ms,
+            "status": status,
+            "attrs": span.attrs,
+        }
+        self._spans.append(row)
+        if self._sink is not None:
+            with self._lock:
+                self._pending.append(row)
+
+    def spans(self, name=None, since=None, limit=None):
+        """
+        Buffered spans, oldest first
+
+        Args:
+            name (str, optional): Only this stage, or stages under it ('llm' matches 'llm.first')
+            since (float, optional): Only spans started after this epoch time
+            limit (int, optional): Keep only the newest `limit`
+        """
+        spans = [
+            span for span in list(self._spans)
+            if (name is None or span["name"] == name or span["name"].startswith(name + "."))
+            and (since is None or span["started_at"] >= since)
+        ]
+        return spans[-limit:] if limit else spans
+
+    def traces(self, limit=20):
+        """Newest traces first, each with its spans in start order"""
+        grouped = {}
+        for span in self.spans():
+            grouped.setdefault(span["trace_id"], []).append(span)
+        traces = []
+        for trace_id, spans in list(grouped.items())[-limit:]:
+            spans.sort(key=lambda span: span["started_at"])
+            root = next((span for span in spans if span["parent_id"] is None), spans[0])
+            traces.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "started_at": root["started_at"],
+                "duration_ms": root["duration_ms"],
+                "spans": spans,
+            })
+        return traces[::-1]
+
+    def stats(self, since=None):
+        """p50/p95/p99 per stage over the buffered spans"""
+        return summarize(self.spans(since=since))
+
+    def clear(self):
+        self._spans.clear()
+
+    def persist_to(self, sink, flush_interval=2.0):
+        """
+        Also hand finished spans to sink(rows) in batches
+
+        Writes happen on a background thread every flush_interval seconds,
+        never on the path being measured.
+        """
+        self._flush_interval = flush_interval
+        self._sink = sink
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="falcon-trace", daemon=True)
+            self._writer.start()
+
+    def flush(self):
+        """Write pending spans to the sink now"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows and self._sink is not None:
+            try:
+                self._sink(rows)
+            except Exception as e:
+                print(f"Could not persist {len(rows)} trace spans: {e}")
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self._flush_interval)
+            self.flush()
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer():
+    """Return the shared tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+def persistence_enabled():
+    """Whether spans are saved to the database; FALCON_TRACE_PERSIST=0 turns it off"""
+    load_dotenv()
+    return os.getenv("FALCON_TRACE_PERSIST", "1").lower() not in ("0", "false", "no", "off")
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark for per-turn database overhead.
+
+Replays the database work of one `process_message` turn (insert the user
+message, read the history window, store the answer) against the old
+connect-per-call access pattern and the pooled FALCONDatabase.
+
+Usage:
+    python Benchmarks/db_overhead.py [turns]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from Backend.Brain import FALCONDatabase
+
+class LegacyDatabase:
+    """The original access pattern: a fresh connection for every call"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user TEXT NOT NULL,
+            assistant TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def add_conversation(self, user_message, assistant_message=None):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO conversations (user, assistant) VALUES (?, ?)',
+                       (user_message, assistant_message))
+        conversation_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return conversation_id
+
+    def update_assistant_response(self, conversation_id, assistant_message):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE conversations SET assistant = ? WHERE id = ?',
+                     (assistant_message, conversation_id))
+        conn.commit()
+        conn.close()
+
+    def get_conversation_history(self, limit=None):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+        SELECT user, assistant FROM conversations
+        WHERE assistant IS NOT NULL ORDER BY timestamp ASC LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+        return rows
+
+def run_turns(db, turns):
+    """Time `turns` simulated turns, returning per-turn latencies in ms"""
+    samples = []
+    for i in range(turns):
+        start = time.perf_counter()
+        conversation_id = db.add_conversation(f"open chrome please #{i}")
+        db.get_conversation_history(limit=20)
+        db.update_assistant_response(conversation_id, "Chrome is open 🚀")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<10} mean {statistics.mean(samples):7.3f} ms   "
+          f"p50 {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+    return statistics.mean(samples)
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyDatabase(os.path.join(tmp, "legacy.db"))
+        pooled = FALCONDatabase(os.path.join(tmp, "pooled.db"))
+
+        print(f"Per-turn DB overhead over {turns} turns")
+        before = report("before", run_turns(legacy, turns))
+        after = report("after", run_turns(pooled, turns))
+        print(f"speedup    {before / after:.1f}x")
+        pooled.close()
+
+if __name__ == "__main__":
+    main()
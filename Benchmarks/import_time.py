@@ -0,0 +1,78 @@
+"""
+Start-up import-time report.
+
+Runs a fresh interpreter with `-X importtime` on the modules Falcon.py
+loads before the window opens and summarizes the raw output: total time,
+the slowest top-level imports, and self time grouped by package. With
+--budget-ms it exits with status 1 when the total goes over budget, so it
+can guard against start-up regressions.
+
+Usage:
+    python Benchmarks/import_time.py [--budget-ms 400] [--top 15] [module ...]
+"""
+import os
+import sys
+import argparse
+import subprocess
+from collections import defaultdict
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+
+# What Falcon.py imports before calling eel.start()
+STARTUP_MODULES = ["eel", "Backend.Core", "Backend.Brain"]
+
+def measure(modules):
+    """Return (self_us, cumulative_us, depth, name) rows from -X importtime"""
+    if not modules:
+        modules = ["sys"]
+    env = dict(os.environ, PYTHONPATH=parent_dir)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        cwd=parent_dir, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=STARTUP_MODULES)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    # Modules the bare interpreter loads anyway aren't ours to optimize
+    baseline = {row[3] for row in measure([])}
+    rows = [row for row in measure(args.modules) if row[3] not in baseline]
+    top_level = [row for row in rows if row[2] == 0]
+    total_ms = sum(row[1] for row in top_level) / 1000
+
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Import time for {', '.join(args.modules)}: {total_ms:.1f} ms "
+          f"({len(rows)} modules)\n")
+    print("Slowest top-level imports (cumulative):")
+    for _, cumulative_us, _, name in sorted(top_level, reverse=True, key=lambda r: r[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print("\nSelf time by package:")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nOver budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,648 @@
+"""
+Offline benchmark of the assistant pipeline with local service stand-ins.
+
+Starts a local HTTP stand-in for Groq's chat completions API (plain,
+streamed and tool-call responses) and swaps Gemini, edge-tts and
+pollinations for in-process fakes with the same call shape. Each one has
+a configurable first-byte latency and token rate. The real code paths
+then run against them: FALCONAssistant.process_message (with and without
+streaming), concurrent tool dispatch, FalconAI.run_task, speech synthesis,
+image and content jobs, and chat export.
+
+Reports throughput, per-stage latency from Backend.Tracing and memory, and
+exits with status 1 if a failed task is confirmed to the user as done.
+
+Absolute timings depend on the machine, so the tracked metrics are local
+costs measured against a fixed calibration loop timed in the same run.
+With --check, they are compared against Benchmarks/baseline.json and the
+script exits with status 1 if any regressed beyond --tolerance.
+--save-baseline records the current run as the new baseline.
+
+Usage:
+    python Benchmarks/pipeline.py [--turns 40] [--latency-ms 120] [--tokens-per-second 300]
+                                  [--tool-rate 0.3] [--tools-per-call 1] [--tool-confirmation template]
+                                  [--check | --save-baseline]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# Nothing here talks to a real service; the keys only satisfy start-up checks
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["FALCON_TRACE_PERSIST"] = "0"
+os.environ["FALCON_EMBEDDER"] = "hashing"
+
+from Backend.Tracing import get_tracer, percentile, summarize
+from trace_report import print_stages
+
+BASELINE_PATH = os.path.join(current_dir, "baseline.json")
+
+# Differences smaller than this are noise, whatever the relative change
+NOISE_FLOOR_MS = 2.0
+
+# Local costs tracked by --check, in units of the calibration loop. Timings
+# bound by the stand-ins' configured latency and process memory are only
+# reported
+TRACKED_TIMES = ("turns.overhead_p50_ms", "tools.dispatch_p50_ms", "task.cached_p50_ms", "tts.cached_p50_ms")
+TRACKED_RATES = ("export.csv_rows_per_s", "export.jsonl_rows_per_s", "export.xlsx_rows_per_s")
+# Tracked as is: tracemalloc counts Python allocations, whatever the machine
+TRACKED_ABSOLUTE = ("export.peak_traced_mb",)
+
+# Behaviour checks made along the way; any entry fails the run
+FAILED_CHECKS = []
+
+WORDS = ("the falcon keeps a steady course over open water while the wind shifts and the light "
+         "changes across the valley as evening settles on the quiet hills").split()
+
+# User messages ask the stand-in for tool calls with a marker, e.g. "#tools=generate_image"
+TOOL_MARKER = re.compile(r"#tools=([\w,]+)")
+TOOL_ARGUMENTS = {
+    "execute_system_task": {"task_description": "tidy the desktop windows"},
+    "generate_image": {"prompt": "a falcon over snowy mountains at dawn"},
+    "write_content": {"topic": "a short note on falcon migration"},
+}
+
+# Tasks carrying one of these markers get code that fails in the sandbox
+# or the safety check, so the failure path of a tool-only turn is exercised
+FAILING_TASKS = {
+    "#crash": "raise RuntimeError('stand-in failure')",
+    "#unsafe": "import shutil\nshutil.rmtree('stand-in')",
+}
+
+def words(count, seed=0):
+    return " ".join(WORDS[(seed + i) % len(WORDS)] for i in range(count))
+
+class GroqStandIn(ThreadingHTTPServer):
+    """
+    Local server speaking the slice of the OpenAI chat completions API FALCON uses.
+
+    Every response waits latency_ms before the first byte, then produces
+    tokens at tokens_per_second. Streamed responses are sent as SSE
+    chunks, one token each, so time-to-first-token is measurable.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency_ms=120, tokens_per_second=300, answer_tokens=40):
+        super().__init__(("127.0.0.1", 0), GroqHandler)
+        self.latency = latency_ms / 1000
+        self.token_interval = 1 / tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/openai/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="groq-stand-in", daemon=True).start()
+        return self
+
+    def reply_for(self, request):
+        """The assistant message a request gets: tool calls, code, a confirmation or an answer"""
+        with self._lock:
+            self.requests += 1
+            seed = self.requests
+        messages = request["messages"]
+        last = messages[-1]
+        if last["role"] == "tool":
+            return {"content": "Done, that is taken care of."}
+
+        text = last.get("content") or ""
+        marker = TOOL_MARKER.search(text)
+        if request.get("tools") and marker:
+            return {"tool_calls": [
+                {"id": f"call_{seed}_{index}", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(TOOL_ARGUMENTS[name])}}
+                for index, name in enumerate(marker.group(1).split(","))
+            ]}
+
+        if any("task executor" in (message.get("content") or "") for message in messages[:3]):
+            for marker, code in FAILING_TASKS.items():
+                if marker in text:
+                    return {"content": f"```python\n{code}\n```"}
+            return {"content": "```python\ntotal = sum(range(10))\n```"}
+        return {"content": words(self.answer_tokens, seed)}
+
+class GroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        message = self.server.reply_for(request)
+        time.sleep(self.server.latency)
+        if request.get("stream"):
+            self.send_stream(request, message)
+        else:
+            self.send_message(request, message)
+
+    def envelope(self, request, kind, choice):
+        return {"id": "chatcmpl-benchmark", "object": kind, "created": int(time.time()),
+                "model": request["model"], "choices": [choice]}
+
+    def send_message(self, request, message):
+        tokens = len((message.get("content") or "").split()) or 1
+        time.sleep(tokens * self.server.token_interval)
+        body = json.dumps(self.envelope(request, "chat.completion", {
+            "index": 0,
+            "message": {"role": "assistant", "content": message.get("content"),
+                        **({"tool_calls": message["tool_calls"]} if "tool_calls" in message else {})},
+            "finish_reason": "tool_calls" if "tool_calls" in message else "stop",
+        })).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data):
+        payload = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+        self.wfile.flush()
+
+    def send_stream(self, request, message):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def delta(fields, finish_reason=None):
+            return json.dumps(self.envelope(request, "chat.completion.chunk",
+                                            {"index": 0, "delta": fields, "finish_reason": finish_reason}))
+
+        self.send_chunk(delta({"role": "assistant", "content": ""}))
+        for index, call in enumerate(message.get("tool_calls", [])):
+            # Name first, arguments in a later fragment, as the real API does
+            self.send_chunk(delta({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                                   "function": {"name": call["function"]["name"], "arguments": ""}}]}))
+            self.send_chunk(delta({"tool_calls": [{"index": index,
+                                                   "function": {"arguments": call["function"]["arguments"]}}]}))
+        for token in (message.get("content") or "").split(" ") if message.get("content") else []:
+            self.send_chunk(delta({"content": token + " "}))
+            time.sleep(self.server.token_interval)
+        self.send_chunk(delta({}, "tool_calls" if "tool_calls" in message else "stop"))
+        self.send_chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+class FakeGeminiModel:
+    """Stands in for genai.GenerativeModel: streams text chunks at a fixed rate"""
+
+    def __init__(self, latency_ms, tokens_per_second, tokens=200, tokens_per_chunk=20):
+        self.latency = latency_ms / 1000
+        self.token_interval = 1 / tokens_per_second
+        self.tokens = tokens
+        self.tokens_per_chunk = tokens_per_chunk
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        def chunks():
+            time.sleep(self.latency)
+            for start in range(0, self.tokens, self.tokens_per_chunk):
+                count = min(self.tokens_per_chunk, self.tokens - start)
+                time.sleep(count * self.token_interval)
+                yield SimpleNamespace(text=words(count, start) + " ")
+        return chunks()
+
+class FakeEdgeTTS:
+    """Stands in for the edge_tts module: Communicate(...).stream() yields MP3-sized chunks"""
+
+    def __init__(self, latency_ms, bytes_per_character=200, chunk_bytes=4096):
+        self.latency = latency_ms / 1000
+        self.bytes_per_character = bytes_per_character
+        self.chunk_bytes = chunk_bytes
+
+    def Communicate(self, text, voice, pitch=None, rate=None):
+        fake = self
+
+        class Communicate:
+            async def stream(self):
+                await asyncio.sleep(fake.latency)
+                remaining = len(text) * fake.bytes_per_character
+                while remaining > 0:
+                    size = min(fake.chunk_bytes, remaining)
+                    remaining -= size
+                    yield {"type": "audio", "data": b"\xff" * size}
+                    await asyncio.sleep(0)
+        return Communicate()
+
+class FakePollinations:
+    """Stands in for the pollinations module: image(...).generate(...) writes a PNG after a delay"""
+
+    def __init__(self, latency_ms, size=256):
+        self.latency = latency_ms / 1000
+        self.size = size
+
+    def image(self, **params):
+        fake = self
+
+        class ImageModel:
+            def generate(self, prompt, negative=None, save=True, file=None):
+                from PIL import Image
+                time.sleep(fake.latency)
+                seed = sum(map(ord, prompt)) % 255
+                Image.new("RGB", (fake.size, fake.size), (seed, 96, 160)).save(file, "PNG")
+        return ImageModel()
+
+def peak_rss_mb():
+    """Process peak resident memory, or None where it can't be read"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+
+def calibrate(rounds=20, rows=2000):
+    """
+    Milliseconds a fixed mix of Python, JSON and SQLite work takes here, best
+    of many short rounds so a noisy machine still shows its real speed.
+    Tracked metrics are expressed against it, so a baseline saved on one
+    machine can be checked on another
+    """
+    data = [(index, words(12, index)) for index in range(rows)]
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE turns (id INTEGER PRIMARY KEY, text TEXT)")
+        conn.executemany("INSERT INTO turns VALUES (?, ?)", data)
+        encoded = [json.dumps({"id": row[0], "text": row[1]}) for row in conn.execute("SELECT id, text FROM turns")]
+        sum(len(json.loads(line)["text"].split()) for line in encoded)
+        conn.close()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def milliseconds(samples):
+    samples = sorted(samples)
+    return {"p50_ms": percentile(samples, 50), "p95_ms": percentile(samples, 95)}
+
+def local_overhead(traces):
+    """Per turn, the time not spent waiting on the LLM or tools"""
+    overheads = []
+    for trace in traces:
+        turn = next((span for span in trace["spans"] if span["name"] == "turn"), None)
+        if turn is None:
+            continue
+        waiting = sum(span["duration_ms"] for span in trace["spans"]
+                      if span["parent_id"] == turn["span_id"]
+                      and (span["name"].startswith("llm.") or span["name"] == "tools"))
+        overheads.append(turn["duration_ms"] - waiting)
+    return overheads
+
+def turn_inputs(count, tool_rate, tools_per_call, seed=7):
+    """User messages for the turn mix: plain questions and tool requests"""
+    rng = random.Random(seed)
+    kinds = list(TOOL_ARGUMENTS)
+    inputs = []
+    for index in range(count):
+        if rng.random() < tool_rate:
+            names = [kinds[(index + offset) % len(kinds)] for offset in range(tools_per_call)]
+            inputs.append(f"handle this for me {index} #tools={','.join(names)}")
+        else:
+            inputs.append(f"tell me something about falcons and {words(3, index)} {index}")
+    return inputs
+
+def wait_for_jobs(assistant, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(job["status"] in ("done", "failed") for job in assistant.get_jobs(200)):
+            return
+        time.sleep(0.05)
+
+def run_turns(assistant, args, results):
+    tracer = get_tracer()
+    tracer.clear()
+    inputs = turn_inputs(args.turns, args.tool_rate, args.tools_per_call)
+    started = time.perf_counter()
+    for user_input in inputs:
+        assistant.process_message(user_input)
+    elapsed = time.perf_counter() - started
+    wait_for_jobs(assistant)
+
+    stages = summarize(tracer.spans())
+    results["turns"] = {
+        "throughput_per_s": len(inputs) / elapsed,
+        "turn_p50_ms": stages["turn"]["p50_ms"],
+        "turn_p95_ms": stages["turn"]["p95_ms"],
+        "overhead_p50_ms": percentile(sorted(local_overhead(tracer.traces(len(inputs) * 2))), 50),
+    }
+    print(f"\nTurns: {len(inputs)} in {elapsed:.2f}s ({results['turns']['throughput_per_s']:.2f}/s)")
+    print_stages(stages)
+
+def run_streaming(assistant, args, results):
+    first_delta = []
+    for index in range(max(args.turns // 2, 1)):
+        started = time.perf_counter()
+        arrived = []
+
+        def on_delta(text):
+            if not arrived:
+                arrived.append(time.perf_counter())
+
+        assistant.process_message(f"stream a reply about {words(4, index)} {index}", True, on_delta)
+        if arrived:
+            first_delta.append((arrived[0] - started) * 1000)
+    stats = milliseconds(first_delta)
+    results["stream"] = {"first_delta_p50_ms": stats["p50_ms"], "first_delta_p95_ms": stats["p95_ms"]}
+    print(f"\nStreaming: first delta p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+
+def run_tools(assistant, args, results):
+    samples = []
+    for index in range(max(args.turns // 4, 1)):
+        calls = [SimpleNamespace(id=f"call_{index}_{name}", type="function",
+                                 function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+                 for name, arguments in TOOL_ARGUMENTS.items()]
+        started = time.perf_counter()
+        assistant.runtime.run(assistant.aexecute_tool_calls(calls))
+        samples.append((time.perf_counter() - started) * 1000)
+    wait_for_jobs(assistant)
+    stats = milliseconds(samples)
+    results["tools"] = {"dispatch_p50_ms": stats["p50_ms"], "dispatch_p95_ms": stats["p95_ms"]}
+    print(f"\nTool dispatch ({len(TOOL_ARGUMENTS)} concurrent calls): "
+          f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+
+def run_task(assistant, args, results):
+    executor = assistant.task_executor
+    cold, cached = [], []
+    for index in range(max(args.turns // 4, 1)):
+        task = f"print a greeting number {index}"
+        for samples in (cold, cached):
+            started = time.perf_counter()
+            executor.run_task(task)
+            samples.append((time.perf_counter() - started) * 1000)
+    results["task"] = {"cold_p50_ms": milliseconds(cold)["p50_ms"], "cached_p50_ms": milliseconds(cached)["p50_ms"]}
+    print(f"\nrun_task: generated p50 {results['task']['cold_p50_ms']:.1f} ms, "
+          f"cached code p50 {results['task']['cached_p50_ms']:.1f} ms")
+
+    # A failed snippet must be reported as a failure, never confirmed as done
+    for marker in FAILING_TASKS:
+        call = SimpleNamespace(function=SimpleNamespace(
+            name="execute_system_task", arguments=json.dumps({"task_description": f"break {marker}"})))
+        content = assistant.execute_system_task(f"break {marker}")
+        if not assistant.TOOL_FAILURE.search(content) or assistant.confirm_tool_calls([call], [{"content": content}]):
+            FAILED_CHECKS.append(f"task {marker}: failure reported as {content!r}")
+
+def run_tts(args, results):
+    from Backend.TTS import synthesize_to_memory, split_sentences
+
+    sentences = split_sentences(". ".join(words(12, index).capitalize() for index in range(args.turns)) + ".")
+
+    async def synthesize_all():
+        cold, cached = [], []
+        for samples in (cold, cached):
+            for sentence in sentences:
+                started = time.perf_counter()
+                await synthesize_to_memory(sentence)
+                samples.append((time.perf_counter() - started) * 1000)
+        return cold, cached
+
+    cold, cached = asyncio.run(synthesize_all())
+    results["tts"] = {"synthesize_p50_ms": milliseconds(cold)["p50_ms"],
+                      "cached_p50_ms": milliseconds(cached)["p50_ms"]}
+    print(f"\nTTS: {len(sentences)} sentences, synthesis p50 {results['tts']['synthesize_p50_ms']:.1f} ms, "
+          f"cached p50 {results['tts']['cached_p50_ms']:.2f} ms")
+
+def run_jobs(assistant, args, results):
+    from Backend.ImageGen import ImageGen, get_image_store
+    from Backend.Automation import get_content_generator
+
+    image_ms, content_ms = [], []
+    for index in range(max(args.turns // 8, 1)):
+        started = time.perf_counter()
+        ImageGen(f"a falcon study number {index}")
+        image_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        get_content_generator().generate_content(f"notes on falcons part {index}", open_file=False)
+        content_ms.append((time.perf_counter() - started) * 1000)
+    results["jobs"] = {"image_p50_ms": milliseconds(image_ms)["p50_ms"],
+                       "content_p50_ms": milliseconds(content_ms)["p50_ms"]}
+    store = get_image_store().stats()
+    print(f"\nImage generation p50 {results['jobs']['image_p50_ms']:.1f} ms, "
+          f"content generation p50 {results['jobs']['content_p50_ms']:.1f} ms")
+    print(f"Image store: {store['hits']} hits, {store['misses']} misses, "
+          f"{store['entries']} images, {store['bytes'] / (1024 * 1024):.1f} MB")
+
+def run_export(assistant, args, results):
+    db = assistant.db
+    with db.pool.transaction() as conn:
+        conn.executemany(db.INSERT_CONVERSATION, (
+            (f"question {index} {words(8, index)}", f"answer {index} {words(30, index)}")
+            for index in range(args.export_rows)
+        ))
+
+    results["export"] = {}
+    for format in ("csv", "jsonl", "xlsx"):
+        # Best of five: throughput is bounded by the code, slower runs by the machine
+        rates = []
+        for _ in range(5):
+            started = time.perf_counter()
+            exported = db.export_conversations(format, path=os.path.join("Database", f"benchmark.{format}"))
+            rates.append(exported["rows"] / (time.perf_counter() - started))
+        results["export"][f"{format}_rows_per_s"] = max(rates)
+
+    # Memory of a streamed export, measured separately so tracing doesn't skew the rates
+    tracemalloc.start()
+    db.export_conversations("csv", path=os.path.join("Database", "benchmark_traced.csv"))
+    results["export"]["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+
+    print(f"\nExport of {exported['rows']} rows: " + ", ".join(
+        f"{format} {results['export'][f'{format}_rows_per_s']:.0f} rows/s" for format in ("csv", "jsonl", "xlsx")
+    ) + f", peak traced memory {results['export']['peak_traced_mb']:.1f} MB")
+
+SCENARIOS = ("turns", "stream", "tools", "task", "tts", "jobs", "export")
+# Options that change what is measured, saved with the baseline
+SETTINGS = ("turns", "latency_ms", "tokens_per_second", "answer_tokens", "tool_rate", "tools_per_call",
+            "tool_confirmation", "tts_latency_ms", "image_latency_ms", "export_rows")
+
+# Rates are better higher; everything else is better lower
+HIGHER_IS_BETTER = ("throughput_per_s", "rows_per_s", "rows_per_calibration")
+# Timings, for which differences under NOISE_FLOOR_MS are ignored
+NOISY_SUFFIXES = ("_ms", "_ms_per_calibration")
+
+def flatten(results):
+    return {f"{scenario}.{name}": value for scenario, metrics in results.items()
+            for name, value in metrics.items() if value is not None}
+
+def tracked(metrics, calibration_ms):
+    """
+    Machine-independent form of the tracked metrics: times as multiples of
+    the calibration loop, rates as rows per calibration loop
+    """
+    relative = {}
+    for name in TRACKED_TIMES:
+        if name in metrics:
+            relative[f"{name}_per_calibration"] = metrics[name] / calibration_ms
+    for name in TRACKED_RATES:
+        if name in metrics:
+            relative[f"{name[:-6]}_per_calibration"] = metrics[name] * calibration_ms / 1000
+    for name in TRACKED_ABSOLUTE:
+        if name in metrics:
+            relative[name] = metrics[name]
+    return relative
+
+def check(metrics, baseline, tolerance, calibration_ms):
+    """Return descriptions of tracked metrics that regressed beyond tolerance"""
+    regressions = []
+    for name, base in baseline.items():
+        value = metrics.get(name)
+        if value is None or not base:
+            continue
+        change = (value - base) / base
+        if name.endswith(HIGHER_IS_BETTER):
+            regressed = change < -tolerance
+        else:
+            # Time ratios convert back to milliseconds for the noise floor
+            scale = calibration_ms if name.endswith("_per_calibration") else 1.0
+            regressed = change > tolerance and (
+                not name.endswith(NOISY_SUFFIXES) or (value - base) * scale > NOISE_FLOOR_MS)
+        if regressed:
+            regressions.append(f"{name}: {value:.3f} vs baseline {base:.3f} ({change:+.0%})")
+    return regressions
+
+def install_stand_ins(args):
+    """Point every external service FALCON uses at a local stand-in"""
+    import Backend.Core as Core
+    import Backend.TTS as TTS
+    import Backend.ImageGen as ImageGen
+    import Backend.Automation as Automation
+
+    server = GroqStandIn(args.latency_ms, args.tokens_per_second, args.answer_tokens).start()
+    Core.GROQ_BASE_URL = server.base_url
+    TTS.edge_tts = FakeEdgeTTS(args.tts_latency_ms)
+    ImageGen.pollinations = FakePollinations(args.image_latency_ms)
+    # Generated images and content would otherwise open in a viewer
+    ImageGen.OpenImage = lambda image_path: None
+    generator = Automation.ContentGenerator(api_key="benchmark")
+    generator.model = FakeGeminiModel(args.latency_ms, args.tokens_per_second)
+    generator._open_file = lambda filepath: None
+    Automation._content_generator = generator
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=120, help="LLM time to first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=300)
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--tool-rate", type=float, default=0.3, help="Share of turns that call tools")
+    parser.add_argument("--tools-per-call", type=int, default=1, help="Tool calls per tool turn")
+    parser.add_argument("--tool-confirmation", default="template", choices=("llm", "template", "background"),
+                        help="How tool-only turns are answered")
+    parser.add_argument("--tts-latency-ms", type=float, default=80)
+    parser.add_argument("--image-latency-ms", type=float, default=300)
+    parser.add_argument("--export-rows", type=int, default=20000)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset to run")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a tracked metric regressed")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {"calibration": {"loop_ms": calibrate()}}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Database, caches, images and content all live under ./Database
+        os.chdir(tmp)
+        server = install_stand_ins(args)
+        from Backend.Brain import FALCONAssistant
+
+        assistant = FALCONAssistant(tool_confirmation=args.tool_confirmation)
+        # Let semantic memory open so the first turns don't race it
+        assistant.memory_executor.submit(lambda: None).result()
+        print(f"Stand-ins: LLM {args.latency_ms:g} ms + {args.tokens_per_second:g} tokens/s, "
+              f"TTS {args.tts_latency_ms:g} ms, images {args.image_latency_ms:g} ms")
+        print(f"Calibration loop: {results['calibration']['loop_ms']:.2f} ms")
+
+        for scenario in scenarios:
+            if scenario == "turns":
+                run_turns(assistant, args, results)
+            elif scenario == "stream":
+                run_streaming(assistant, args, results)
+            elif scenario == "tools":
+                run_tools(assistant, args, results)
+            elif scenario == "task":
+                run_task(assistant, args, results)
+            elif scenario == "tts":
+                run_tts(args, results)
+            elif scenario == "jobs":
+                run_jobs(assistant, args, results)
+            elif scenario == "export":
+                run_export(assistant, args, results)
+
+        results["process"] = {"peak_rss_mb": peak_rss_mb()}
+        print(f"\nPeak RSS {results['process']['peak_rss_mb'] or 0:.1f} MB, "
+              f"{server.requests} LLM requests served")
+        assistant.jobs.shutdown()
+        assistant.db.close()
+        server.shutdown()
+        os.chdir(parent_dir)
+
+    if FAILED_CHECKS:
+        print("\nFailed checks:")
+        for failure in FAILED_CHECKS:
+            print(f"  {failure}")
+        return 1
+
+    # Sampled again after the run; the best round overall is the machine's speed
+    calibration_ms = min(results["calibration"]["loop_ms"], calibrate())
+    metrics = tracked(flatten(results), calibration_ms)
+    # Metrics are only comparable between runs with the same stand-in settings
+    settings = {name: getattr(args, name) for name in SETTINGS}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings,
+                       "metrics": {name: round(value, 4) for name, value in metrics.items()}},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except OSError:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        if baseline["settings"] != settings:
+            print("\nWarning: settings differ from the baseline's, so differences may not be regressions")
+        regressions = check(metrics, baseline["metrics"], args.tolerance, calibration_ms)
+        if regressions:
+            print("\nRegressions beyond the {:.0%} tolerance:".format(args.tolerance))
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo tracked metric regressed beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Corpus check and benchmark for the generated-code safety analyzer.
+
+Builds a few thousand labelled snippets in the shape the task executor
+produces, checks every verdict from SafetyAnalyzer against its label, and
+times the analyzer (cold and memoized) against the old regex scan. Exits
+with status 1 if any snippet is misclassified.
+
+Usage:
+    python Benchmarks/safety_corpus.py [snippets]
+"""
+import os
+import re
+import sys
+import time
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from Backend.Safety import SafetyAnalyzer
+
+APPS = ["chrome", "notepad", "spotify", "discord", "telegram", "firefox", "code", "msedge"]
+SITES = ["https://www.google.com", "https://www.youtube.com", "https://github.com", "https://mail.google.com"]
+
+SAFE_TEMPLATES = [
+    "import webbrowser\nimport time\n\nwebbrowser.open('{site}/?q={n}')\ntime.sleep(1)\nprint('opened {n}')",
+    "import psutil\n\nfor proc in psutil.process_iter(['pid', 'name']):\n    if '{app}' in proc.info['name'].lower():\n        proc.terminate()\nprint('closed {app} {n}')",
+    "import os\n\nif os.name == 'nt':\n    os.system('taskkill /im {app}.exe /f')\nelse:\n    os.system('pkill -f {app}')\nprint({n})",
+    "import subprocess\nsubprocess.Popen(['{app}', '--new-window'])\n# run {n}",
+    "import pyautogui\nimport time\n\ntime.sleep(0.5)\npyautogui.hotkey('ctrl', 't')\npyautogui.write('query {n}', interval=0.05)",
+    "import datetime\nnow = datetime.datetime.now()\nprint(now.strftime('%H:%M'), {n})",
+    "import os\npath = os.path.join(os.getcwd(), 'notes_{n}.txt')\nwith open(path) as f:\n    print(f.read())",
+    "import random\nimport webbrowser\nsongs = ['a', 'b', 'c']\nwebbrowser.open('https://www.youtube.com/results?search_query=' + random.choice(songs) + '{n}')",
+    "items = [{n}, 2, 3]\nitems.remove(2)\nprint(', '.join(str(i) for i in items).replace(',', ';'))",
+    "import subprocess\nsubprocess.run(['taskkill', '/im', '{app}.exe', '/f'], stdout=subprocess.DEVNULL)\n# {n}",
+    "import os\nos.system('start {site}/?q={n}')",
+    "import subprocess\nurl = '{site}/?q={n}'\nsubprocess.Popen(['{app}', url])",
+    "import os\nos.startfile('C:/Users/Public/notes_{n}.txt')",
+    "import os\nos.system('start /max {app}')  # {n}",
+    "from tkinter import messagebox\nmessagebox.showinfo('Falcon', 'Reminder {n}')",
+    "import pywhatkit\npywhatkit.playonyt('lofi mix {n}')",
+]
+
+UNSAFE_TEMPLATES = [
+    "import os\nos.system('rm -rf /home/user/{n}')",
+    "import os\nos.remove('C:/Windows/system32/{app}.dll')  # {n}",
+    "import shutil\nshutil.rmtree('/tmp/{n}')",
+    "from pathlib import Path\nPath('/etc/hosts_{n}').write_text('127.0.0.1 {app}')",
+    "eval('print({n})')",
+    "__import__('os').system('echo {n}')",
+    "with open('/tmp/{app}_{n}.txt', 'w') as f:\n    f.write('x')",
+    "x = ().__class__.__bases__[0].__subclasses__()  # {n}",
+    "import subprocess\nsubprocess.run(['rm', '-rf', '/var/{n}'])",
+    "import subprocess\ncmd = 'del /f /q C:\\\\{n}'\nsubprocess.run(cmd, shell=True)",
+    "from os import system as run\nrun('shutdown /s /t {n}')",
+    "import ctypes\nctypes.windll.user32.LockWorkStation()  # {n}",
+    "getattr(os, 'rem' + 'ove')('{app}_{n}')",
+    "import sys\nsys.modules['os'].unlink('/tmp/{n}')",
+    "x = os\nx.remove('{app}_{n}')",
+    "o = open\no('/tmp/{app}_{n}.txt', 'w').write('x')",
+    "import os\nos.path.os.remove('/tmp/{n}')",
+    "import ctypes.wintypes\nctypes.CDLL(None).system(b'rm -rf ~')  # {n}",
+    "import os\nos.system('find / -name {app}_{n} -delete')",
+    "import webbrowser\nwebbrowser.os.system('echo {n}')",
+    "import subprocess\nrun = subprocess.run\nrun(['{app}', '{n}'])",
+    "from os import path\nhelper = path\nhelper.os.remove('{app}_{n}')",
+    "import os\nos.system('taskkill /im {app}.exe /f & del /q C:\\\\{n}')",
+    "import subprocess\nsubprocess.run(['cmd', '/c', 'del', 'C:\\\\{n}'])",
+    "import os\nos.system('start C:\\\\Users\\\\Public\\\\{app}_{n}.bat')",
+    "import subprocess\nsubprocess.run(f'pkill -f {{name}}', shell=True)  # {n}",
+    "import psutil\npsutil.Popen(['powershell', '-c', 'Remove-Item {n}'])",
+    "import os\nos.startfile(r'C:/Windows/System32/cmd.exe')  # {n}",
+    "import tkinter\ntkinter.Tcl().eval('exec rm -rf /tmp/{n}')",
+    "import pywhatkit\npywhatkit.shutdown({n})",
+    "import os\nos.system('start cmd /c \"del /q C:\\\\{n}\"')",
+    "import os\nos.system('start powershell -c Remove-Item -Recurse C:/Users/{n}')",
+    "import subprocess\nsubprocess.Popen(['start', 'cmd'])  # {n}",
+    "import tkinter\nroot = tkinter.Tk()\nroot.tk.call('exec', 'rm', '-rf', '/tmp/{n}')",
+    "import webbrowser\nwebbrowser.get('cmd /c del %s').open('C:/{n}')",
+    "import os\nos.system('xdg-open /home/user/{app}_{n}.sh')",
+]
+
+def legacy_validate(code):
+    """The regex scan used before the AST analyzer"""
+    dangerous_patterns = [
+        r'rm\s+-rf',
+        r'del\s+/[fFsS]',
+        r'format\s+[cC]:',
+        r'__import__\s*\(\s*["\']os["\']',
+        r'eval\s*\(',
+        r'exec\s*\(',
+        r'open\s*\([^)]*["\'][wWaA]'
+    ]
+    for pattern in dangerous_patterns:
+        if re.search(pattern, code, re.IGNORECASE):
+            return False
+    return True
+
+def build_corpus(size, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for n in range(size):
+        safe = n % 2 == 0
+        template = rng.choice(SAFE_TEMPLATES if safe else UNSAFE_TEMPLATES)
+        code = template.format(n=n, app=rng.choice(APPS), site=rng.choice(SITES))
+        corpus.append((code, safe))
+    return corpus
+
+def timed(function, corpus):
+    start = time.perf_counter()
+    verdicts = [function(code) for code, _ in corpus]
+    return verdicts, time.perf_counter() - start
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    corpus = build_corpus(size)
+    analyzer = SafetyAnalyzer(cache_size=size)
+
+    legacy, legacy_seconds = timed(legacy_validate, corpus)
+    cold, cold_seconds = timed(lambda code: analyzer.analyze(code).safe, corpus)
+    _, warm_seconds = timed(lambda code: analyzer.analyze(code).safe, corpus)
+
+    wrong = [(code, label) for (code, label), verdict in zip(corpus, cold) if verdict != label]
+    legacy_bypasses = sum(1 for (_, label), verdict in zip(corpus, legacy) if verdict and not label)
+    unsafe_total = sum(1 for _, label in corpus if not label)
+
+    print(f"Safety corpus: {size} snippets ({unsafe_total} unsafe)")
+    print(f"regex scan    {legacy_seconds * 1e6 / size:8.1f} us/snippet   "
+          f"unsafe snippets passed: {legacy_bypasses}")
+    print(f"ast (cold)    {cold_seconds * 1e6 / size:8.1f} us/snippet   "
+          f"misclassified: {len(wrong)}")
+    print(f"ast (cached)  {warm_seconds * 1e6 / size:8.1f} us/snippet")
+
+    for code, label in wrong[:5]:
+        print(f"\nExpected {'safe' if label else 'unsafe'}: {analyzer.analyze(code)}\n{code}")
+
+    return 1 if wrong else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
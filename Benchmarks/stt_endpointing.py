@@ -0,0 +1,125 @@
+"""
+WAV-driven check and benchmark for speech endpointing.
+
+Synthesizes a recording with room noise and two voiced stretches at known
+times, writes it to a WAV file and runs it through the same path as the
+microphone: WavSource, segment_stream and SpeechEngine with a stand-in
+recognizer. Every detected utterance must cover its voiced stretch, start
+no earlier than the pre-roll allows and end no later than the trailing
+silence allows. Once the file has ended, SpeechEngine.listen() must
+return None straight away rather than wait forever. Exits with status 1
+on any mismatch.
+
+Usage:
+    python Benchmarks/stt_endpointing.py [--noise 40] [--level 2500]
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import threading
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from Backend.STT import SAMPLE_RATE, FRAME_MS, WavSource, SpeechEngine, segment_stream
+
+# Voiced stretches in the synthetic recording, in seconds
+UTTERANCES = [(0.69, 2.01), (2.70, 4.23)]
+DURATION = 5.2
+
+# Endpointer defaults the boundaries are checked against
+PRE_ROLL_MS = 300
+TRAILING_MS = 200
+
+def synthesize(path, noise, level, seed=7):
+    """Write room noise with a syllable-modulated voice over each stretch in UTTERANCES"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(DURATION * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = rng.normal(0.0, noise, t.size)
+    for start, end in UTTERANCES:
+        voiced = (t >= start) & (t < end)
+        # A 140 Hz voice with harmonics, its loudness rising and falling four times a second
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * (t[voiced] - start))
+        tone = sum(np.sin(2 * np.pi * 140 * k * t[voiced]) / k for k in (1, 2, 3))
+        signal[voiced] += level * envelope * tone
+    samples = np.clip(signal, -32768, 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+def returns_promptly(engine, deadline=3.0):
+    """Whether listen() with no timeout comes back within deadline seconds"""
+    returned = threading.Event()
+    threading.Thread(target=lambda: (engine.listen(), returned.set()), daemon=True).start()
+    return returned.wait(deadline)
+
+def check_boundaries(segments):
+    """Return descriptions of utterances that were missed, split or cut wrongly"""
+    slack = 2 * FRAME_MS / 1000
+    problems = []
+    if len(segments) != len(UTTERANCES):
+        problems.append(f"expected {len(UTTERANCES)} utterances, found {len(segments)}")
+    for (start, end), (found_start, found_end) in zip(UTTERANCES, segments):
+        if not start - PRE_ROLL_MS / 1000 - slack <= found_start <= start:
+            problems.append(f"utterance at {start:.2f}s starts at {found_start:.2f}s")
+        if not end <= found_end <= end + TRAILING_MS / 1000 + slack:
+            problems.append(f"utterance ending at {end:.2f}s ends at {found_end:.2f}s")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--noise", type=float, default=40, help="Room noise, RMS in 16-bit units")
+    parser.add_argument("--level", type=float, default=2500, help="Voice amplitude in 16-bit units")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "utterances.wav")
+        synthesize(path, args.noise, args.level)
+
+        started = time.perf_counter()
+        segments = [(start, end) for start, end, _ in segment_stream(WavSource(path))]
+        elapsed = time.perf_counter() - started
+
+        # The engine's capture and recognition threads, fed from the same file
+        heard = []
+        engine = SpeechEngine(source=WavSource(path),
+                              recognize=lambda audio: f"utterance {len(heard) + 1}")
+        for text in engine.stream():
+            heard.append(text)
+        # Capture has ended; listening again restarts it and hits the end at once
+        restarted = returns_promptly(engine)
+        engine.stop()
+
+        # Capture ends while nobody is listening; the end must not be discarded
+        idle = SpeechEngine(source=WavSource(path), recognize=lambda audio: "unheard")
+        idle.start()
+        for thread in idle._threads:
+            thread.join()
+        ended = returns_promptly(idle)
+        idle.stop()
+
+    print(f"Endpointing: {DURATION:.1f}s of audio in {elapsed * 1000:.1f} ms "
+          f"({DURATION / elapsed:.0f}x real time)")
+    for (start, end), (found_start, found_end) in zip(UTTERANCES, segments):
+        print(f"  voiced {start:5.2f}s - {end:5.2f}s   detected {found_start:5.2f}s - {found_end:5.2f}s")
+
+    problems = check_boundaries(segments)
+    if len(heard) != len(UTTERANCES):
+        problems.append(f"SpeechEngine transcribed {len(heard)} utterances, expected {len(UTTERANCES)}")
+    if not restarted:
+        problems.append("listen() after the end of a stream did not return")
+    if not ended:
+        problems.append("listen() after capture ended unattended did not return")
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
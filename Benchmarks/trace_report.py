@@ -0,0 +1,82 @@
+"""
+Per-stage latency report from recorded traces.
+
+Reads the spans FALCON saves to its database (see Backend/Tracing.py)
+and prints count, p50, p95, p99 and max for every pipeline stage: the
+turn as a whole, database calls, history, LLM calls, tools, jobs and
+speech. With --slowest it also lists the slowest turns stage by stage.
+
+Usage:
+    python Benchmarks/trace_report.py [--hours 24] [--stage llm] [--slowest 5] [--db Database/FALCON.db]
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from Backend.Brain import FALCONDatabase
+from Backend.Tracing import summarize
+
+def print_stages(summary):
+    width = max([len(name) for name in summary] + [5])
+    print(f"  {'stage':<{width}}  {'count':>6}  {'errors':>6}  {'p50 ms':>9}  {'p95 ms':>9}  "
+          f"{'p99 ms':>9}  {'max ms':>9}")
+    for name, stage in summary.items():
+        print(f"  {name:<{width}}  {stage['count']:>6}  {stage['errors']:>6}  {stage['p50_ms']:>9.1f}  "
+              f"{stage['p95_ms']:>9.1f}  {stage['p99_ms']:>9.1f}  {stage['max_ms']:>9.1f}")
+
+def print_slowest(spans, count):
+    by_trace = {}
+    for span in spans:
+        by_trace.setdefault(span["trace_id"], []).append(span)
+    turns = sorted((span for span in spans if span["name"] == "turn"),
+                   key=lambda span: -span["duration_ms"])[:count]
+    for turn in turns:
+        started = datetime.datetime.fromtimestamp(turn["started_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"\n  {started}  {turn['duration_ms']:.1f} ms  ({turn['attrs'].get('path', '?')})")
+        for span in sorted(by_trace[turn["trace_id"]], key=lambda span: span["started_at"]):
+            if span is turn:
+                continue
+            offset = (span["started_at"] - turn["started_at"]) * 1000
+            print(f"    +{offset:8.1f} ms  {span['duration_ms']:9.1f} ms  {span['name']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=os.path.join(parent_dir, "Database", "FALCON.db"))
+    parser.add_argument("--hours", type=float, default=24.0, help="Only spans from the last N hours (0 for all)")
+    parser.add_argument("--stage", default=None, help="Only this stage and the stages under it")
+    parser.add_argument("--slowest", type=int, default=0, help="Also break down the N slowest turns")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No database at {args.db}")
+        return 1
+    since = time.time() - args.hours * 3600 if args.hours else None
+    db = FALCONDatabase(args.db)
+    try:
+        spans = db.get_spans(since)
+    finally:
+        db.close()
+
+    # The turn breakdown always uses every span; --stage only narrows the table
+    stage_spans = [span for span in spans if not args.stage or span["name"] == args.stage
+                   or span["name"].startswith(args.stage + ".")]
+    if not stage_spans:
+        print("No spans recorded in that window. Is FALCON_TRACE_PERSIST turned off?")
+        return 1
+
+    window = f"last {args.hours:g} h" if args.hours else "all time"
+    print(f"{len(stage_spans)} spans, {window}:\n")
+    print_stages(summarize(stage_spans))
+    if args.slowest:
+        print(f"\nSlowest {args.slowest} turns:")
+        print_slowest(spans, args.slowest)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
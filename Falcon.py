@@ -1,6 +1,8 @@
 import eel
 import os
 import sys
+import time
+import queue
 
 # Add current directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,7 +12,7 @@ if current_dir not in sys.path:
 # Import backend modules
 try:
     from Backend.Brain import FALCONAssistant
-    from Backend.TTS import SpeakFalcon
+    from Backend.Core import warm_up
 except ImportError as e:
     print(f"Critical Import Error: {e}")
     sys.exit(1)
@@ -42,10 +44,31 @@ if not os.path.isfile(os.path.join(web_folder, 'index.html')):
 # Initialize Eel
 eel.init(web_folder)
 
+def await_core(coroutine, on_tick=None, poll_interval=0.01):
+    """
+    Run a coroutine on the assistant's core event loop and wait for it.
+
+    Eel serves every call on a gevent greenlet, so blocking here would stall
+    all other UI requests. Instead we yield to gevent while the core works,
+    which lets queries, history and search calls overlap.
+    """
+    # Keep the caller's trace span, which the core loop's context lacks
+    future = assistant.runtime.submit(assistant.tracer.bind(coroutine))
+    while not future.done():
+        if on_tick:
+            on_tick()
+        eel.sleep(poll_interval)
+    if on_tick:
+        on_tick()
+    return future.result()
+
 @eel.expose
-def process_user_query(user_query_text: str):
+def process_user_query(user_query_text: str, stream: bool = False):
     """
     Process user query with FALCONAssistant and return response
+
+    With stream enabled, text deltas are pushed to the UI through the
+    exposed falcon_stream_delta JS callback while the answer is generated.
     """
     print(f"User Query: {user_query_text}")
     
@@ -54,7 +77,19 @@ def process_user_query(user_query_text: str):
         return {'response': no_input_response, 'should_speak': True}
 
     try:
-        ai_response_text = assistant.process_message(user_query_text)
+        # Deltas arrive on the core thread; they are pushed to the UI from
+        # this greenlet, since Eel's websocket isn't thread-safe
+        deltas = queue.SimpleQueue()
+
+        def push_deltas():
+            while not deltas.empty():
+                eel.falcon_stream_delta(deltas.get())
+
+        with assistant.tracer.span("query", stream=stream):
+            ai_response_text = await_core(
+                assistant.aprocess_message(user_query_text, stream, deltas.put if stream else None),
+                on_tick=push_deltas
+            )
         print(f"FALCON Response: {ai_response_text}")
         
         # Determine if response should be spoken
@@ -79,51 +114,243 @@ def request_tts(text_to_speak: str):
     
     if text_to_speak and isinstance(text_to_speak, str) and text_to_speak.strip():
         try:
-            SpeakFalcon(text_to_speak)
-            print("TTS Playback initiated.")
+            from Backend.TTS import SpeakFalcon
+
+            # Queued on the speech worker so this Eel call returns immediately
+            SpeakFalcon(text_to_speak, block=False)
+            print("TTS Playback queued.")
         except Exception as e:
             print(f"Error during TTS: {e}")
     else:
         print("TTS Request: No valid text to speak.")
 
+@eel.expose
+def stop_tts():
+    """
+    Stop current speech and drop queued utterances
+    """
+    # Nothing can be playing if the TTS module was never loaded
+    if 'Backend.TTS' not in sys.modules:
+        return
+    try:
+        from Backend.TTS import StopSpeaking
+        StopSpeaking()
+    except Exception as e:
+        print(f"Error stopping TTS: {e}")
+
+@eel.expose
+def get_tts_cache_stats():
+    """
+    Get TTS audio cache hit/miss counters
+    """
+    try:
+        from Backend.TTS import GetSpeechCacheStats
+        return GetSpeechCacheStats()
+    except Exception as e:
+        print(f"Error getting TTS cache stats: {e}")
+        return {}
+
+# Job updates arrive on worker threads; a greenlet forwards them to the UI
+job_updates = queue.SimpleQueue()
+assistant.jobs.add_listener(job_updates.put)
+# Requeued only now, so the UI hears about jobs a previous run left unfinished
+assistant.jobs.resume()
+
+def push_job_updates(poll_interval=0.1):
+    while True:
+        while not job_updates.empty():
+            try:
+                eel.falcon_job_update(job_updates.get())
+            except Exception as e:
+                print(f"Error pushing job update: {e}")
+        eel.sleep(poll_interval)
+
+@eel.expose
+def get_jobs(limit: int = 20):
+    """
+    List recent background jobs (image and content generation)
+    """
+    try:
+        return assistant.get_jobs(int(limit))
+    except Exception as e:
+        print(f"Error listing jobs: {e}")
+        return []
+
+@eel.expose
+def get_job(job_id: str):
+    """
+    Get one background job's status, progress and result
+    """
+    try:
+        return assistant.get_job(job_id)
+    except Exception as e:
+        print(f"Error getting job {job_id}: {e}")
+        return None
+
+@eel.expose
+def get_images(limit: int = 20):
+    """
+    List stored generated images with their generation parameters
+    """
+    try:
+        return assistant.get_images(int(limit))
+    except Exception as e:
+        print(f"Error listing images: {e}")
+        return []
+
+@eel.expose
+def get_image_thumbnail(key: str):
+    """
+    Get a stored image's thumbnail as a data URL
+    """
+    try:
+        return assistant.get_image_thumbnail(key)
+    except Exception as e:
+        print(f"Error getting image thumbnail: {e}")
+        return None
+
+@eel.expose
+def get_image_cache_stats():
+    """
+    Get generated-image store hit/miss counters and size
+    """
+    try:
+        return assistant.get_image_cache_stats()
+    except Exception as e:
+        print(f"Error getting image cache stats: {e}")
+        return {}
+
+@eel.expose
+def get_response_cache_stats():
+    """
+    Get response cache hit/miss counters
+    """
+    try:
+        return assistant.get_response_cache_stats()
+    except Exception as e:
+        print(f"Error getting response cache stats: {e}")
+        return {}
+
+@eel.expose
+def get_trace_stats(since_seconds: float = None):
+    """
+    Get p50/p95/p99 latency per pipeline stage, optionally over the last few seconds
+    """
+    try:
+        since = time.time() - float(since_seconds) if since_seconds else None
+        return assistant.get_trace_stats(since)
+    except Exception as e:
+        print(f"Error getting trace stats: {e}")
+        return {}
+
+@eel.expose
+def get_traces(limit: int = 20):
+    """
+    Get recent traces (one per turn, job or utterance) with their spans
+    """
+    try:
+        return assistant.get_traces(int(limit))
+    except Exception as e:
+        print(f"Error getting traces: {e}")
+        return []
+
 @eel.expose
 def get_conversation_history():
     """
     Get conversation history from database
     """
     try:
-        history = assistant.db.get_conversation_history(limit=50)
+        history = await_core(assistant.aget_conversation_history(limit=50))
         return history
     except Exception as e:
         print(f"Error getting conversation history: {e}")
         return []
 
 @eel.expose
-def search_conversations(keyword: str):
+def search_conversations(keyword: str, page: int = 1, page_size: int = 20):
     """
-    Search conversations by keyword
+    Search conversations by keyword, one page of ranked results at a time
     """
     try:
-        results = assistant.search_messages(keyword)
-        return results
+        page = max(int(page), 1)
+        page_size = max(int(page_size), 1)
+        # Fetch one extra row to know whether another page exists
+        results = await_core(assistant.asearch_messages(keyword, page_size + 1, (page - 1) * page_size))
+        return {
+            'results': results[:page_size],
+            'page': page,
+            'has_more': len(results) > page_size
+        }
     except Exception as e:
         print(f"Error searching conversations: {e}")
+        return {'results': [], 'page': page, 'has_more': False}
+
+@eel.expose
+def get_code_cache():
+    """
+    List cached automation code
+    """
+    try:
+        return assistant.get_code_cache()
+    except Exception as e:
+        print(f"Error getting code cache: {e}")
         return []
 
 @eel.expose
-def export_chat_history(format_type: str = 'csv'):
+def purge_code_cache(task_key: str = None):
     """
-    Export chat history in specified format
+    Remove one cached automation entry, or all of them
     """
     try:
-        exported_data = assistant.export_chat_history(format_type)
-        return exported_data
+        return assistant.purge_code_cache(task_key)
+    except Exception as e:
+        print(f"Error purging code cache: {e}")
+        return 0
+
+@eel.expose
+def export_chat_history(format_type: str = 'csv', start_date: str = None, end_date: str = None):
+    """
+    Export chat history to a file in the specified format (csv, jsonl or excel)
+
+    The export is written in chunks; progress is pushed to the UI through
+    the exposed falcon_export_progress JS callback. Returns the file's path
+    and row count rather than its contents.
+    """
+    try:
+        progress = queue.SimpleQueue()
+
+        def push_progress():
+            latest = None
+            while not progress.empty():
+                latest = progress.get()
+            if latest:
+                eel.falcon_export_progress({'written': latest[0], 'total': latest[1]})
+
+        return await_core(
+            assistant.aexport_chat_history(format_type, start_date, end_date,
+                                           on_progress=lambda written, total: progress.put((written, total))),
+            on_tick=push_progress,
+            poll_interval=0.1
+        )
     except Exception as e:
         print(f"Error exporting chat history: {e}")
         return None
 
+def finish_warm_up(seconds):
+    """Start the sandbox workers and load the token encoding once warm-up has imported everything"""
+    from Backend.Context import get_encoding
+
+    assistant.task_executor.sandbox
+    get_encoding()
+    print(f"Warm-up finished in {seconds:.2f}s")
+
 if __name__ == '__main__':
     print("Starting FALCON UI application...")
+
+    # Heavy modules, API clients and sandbox workers load in the background
+    # while the window opens
+    warm_up(on_ready=finish_warm_up)
+    eel.spawn(push_job_updates)
     print("Access the UI at http://localhost:8000")
     
     try: